@@ -0,0 +1,230 @@
+# benchmarks/bench.py
+"""
+Headless latency/throughput benchmark for each module and the full pipeline.
+
+    python benchmarks/bench.py                          # every target on a synthetic clip
+    python benchmarks/bench.py --clip lobby.mp4 --frames 600 --output run.json
+    python benchmarks/bench.py --target guard_tracker --target pipeline
+
+Each target runs in its own subprocess so model-load time and peak RSS are
+measured from a cold start and do not leak between targets. The report is
+JSON, so two runs can be diffed to catch regressions.
+
+Module targets time run() per frame. The pipeline target is main.py's
+single-camera path: a FrameScheduler reading the clip, with annotation
+compositing, alert dispatch and the event log. Its latency is measured from
+capture to render, queueing included, and its fps is wall-clock throughput.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from core import registry  # noqa: E402
+from core.alerts import AlertDispatcher, LogSink  # noqa: E402
+from core.event_log import EventLog  # noqa: E402
+from core.frame_context import FrameContext  # noqa: E402
+from core.scheduler import FrameScheduler  # noqa: E402
+
+TARGETS = [*registry.module_names(), "pipeline"]
+
+
+def synthetic_clip(frames, width, height, seed=0):
+    """
+    Deterministic textured background with a few moving blocks, so motion-based
+    logic has work to do. Frames are generated lazily so the clip does not
+    inflate the measured peak RSS.
+    """
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (31, 31), 0)
+    blocks = [(rng.integers(0, width), rng.integers(0, height), rng.integers(-12, 12), rng.integers(-8, 8),
+               tuple(int(c) for c in rng.integers(0, 255, 3))) for _ in range(4)]
+    for i in range(frames):
+        frame = background.copy()
+        for x, y, dx, dy, color in blocks:
+            cx, cy = int(x + dx * i) % width, int(y + dy * i) % height
+            cv2.rectangle(frame, (cx, cy), (cx + width // 8, cy + height // 4), color, -1)
+        yield frame
+
+
+def load_clip(path, frames):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video file: {path}")
+    try:
+        for _ in range(frames):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+class ClipCapture:
+    """cv2.VideoCapture stand-in for FrameScheduler that records when each frame was read"""
+
+    def __init__(self, clip):
+        self.frames = iter(clip)
+        self.read_times = []
+
+    def read(self):
+        frame = next(self.frames, None)
+        if frame is None:
+            return False, None
+        self.read_times.append(time.perf_counter())
+        return True, frame
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2 ** 20
+        except (ImportError, AttributeError):
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if platform.system() == "Darwin" else peak / 2 ** 10
+
+
+def bench_module(target, clip, warmup):
+    start = time.perf_counter()
+    # Benchmark the anomaly detector's active path regardless of the time of day
+    module = registry.create(target, {"active_hours": [0, 24]} if target == "anomaly_detector" else None)
+    load_s = time.perf_counter() - start
+
+    latencies = []
+    context = None
+    for i, frame in enumerate(clip):
+        context = FrameContext(frame, f"frame {i}", prev=context, time=i / 30.0)
+        t0 = time.perf_counter()
+        module.run(context.frame, context.timestamp, context=context)
+        if i >= warmup:
+            latencies.append(time.perf_counter() - t0)
+    return load_s, latencies, sum(latencies)
+
+
+def bench_pipeline(clip, warmup):
+    """main.run_single_stream without the window: every frame is processed, none dropped"""
+    import main
+    start = time.perf_counter()
+    camera = {"source": "bench", "modules": registry.module_specs(main.DEFAULT_MODULES)}
+    detector = main.make_detector([camera])
+    modules = main.build_modules(camera["modules"], detector)
+    load_s = time.perf_counter() - start
+
+    capture = ClipCapture(clip)
+    scheduler = FrameScheduler(capture, modules, {**main.SCHEDULER_CONFIG, "drop_policy": "block"},
+                               detector=detector)
+    alerts = AlertDispatcher([LogSink(os.devnull)], main.ALERT_CONFIG).start()
+    latencies = []
+    with tempfile.TemporaryDirectory() as directory:
+        events = EventLog(directory)
+        for i, (frame, timestamp, results) in enumerate(scheduler):
+            events.extend(results, timestamp)
+            for idx, result in enumerate(results):
+                alerts.submit(result, timestamp)
+                main.draw_status_overlay(frame, result, idx)
+            if i >= warmup:
+                latencies.append(time.perf_counter() - capture.read_times[i])
+        end = time.perf_counter()
+        scheduler.stop()
+        alerts.stop()
+        events.close()
+    total_s = end - capture.read_times[warmup] if latencies else 0.0
+    return load_s, latencies, total_s
+
+
+def bench_target(target, clip, warmup):
+    if target == "pipeline":
+        load_s, latencies, total_s = bench_pipeline(clip, warmup)
+    else:
+        load_s, latencies, total_s = bench_module(target, clip, warmup)
+
+    rss = peak_rss_mb()
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "target": target,
+        "frames": len(latencies),
+        "load_s": round(load_s, 3),
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 3) if len(latencies) else None,
+            **{f"p{q}": round(float(np.percentile(latencies_ms, q)), 3) if len(latencies) else None
+               for q in (50, 95, 99)},
+        },
+        "fps": round(len(latencies) / total_s, 2) if total_s else None,
+        "peak_rss_mb": round(rss, 1) if rss is not None else None,
+    }
+
+
+def run_isolated(target, args):
+    """Runs one target in a fresh interpreter and returns its JSON result"""
+    command = [sys.executable, os.path.abspath(__file__), "--worker", target,
+               "--frames", str(args.frames), "--warmup", str(args.warmup),
+               "--width", str(args.width), "--height", str(args.height), "--seed", str(args.seed)]
+    if args.clip:
+        command += ["--clip", args.clip]
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"target": target, "error": completed.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark monitoring modules and the full pipeline headless.")
+    parser.add_argument("--target", action="append", choices=TARGETS,
+                        help="Module or 'pipeline'; repeat for several (default: all)")
+    parser.add_argument("--clip", help="Recorded video to replay (default: synthetic clip)")
+    parser.add_argument("--frames", type=int, default=300, help="Frames to process, including warm-up (default: 300)")
+    parser.add_argument("--warmup", type=int, default=10, help="Leading frames excluded from latency stats (default: 10)")
+    parser.add_argument("--width", type=int, default=1280, help="Synthetic clip width (default: 1280)")
+    parser.add_argument("--height", type=int, default=720, help="Synthetic clip height (default: 720)")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic clip seed (default: 0)")
+    parser.add_argument("--output", metavar="FILE", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--worker", choices=TARGETS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        clip = load_clip(args.clip, args.frames) if args.clip else \
+            synthetic_clip(args.frames, args.width, args.height, args.seed)
+        print(json.dumps(bench_target(args.worker, clip, args.warmup)))
+        return
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"system": platform.platform(), "python": platform.python_version(),
+                     "processor": platform.processor(), "cpus": os.cpu_count(),
+                     "opencv": cv2.__version__, "opencv_threads": cv2.getNumThreads()},
+        "clip": args.clip or {"synthetic": True, "width": args.width, "height": args.height, "seed": args.seed},
+        "frames": args.frames,
+        "warmup": args.warmup,
+        "results": [],
+    }
+    for target in args.target or TARGETS:
+        result = run_isolated(target, args)
+        report["results"].append(result)
+        print(f"[BENCH] {target}: {result}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
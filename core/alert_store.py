@@ -0,0 +1,57 @@
+# core/alert_store.py
+from collections import OrderedDict, deque
+
+
+class AlertStore:
+    """
+    Bounded, deduplicated alert history for long-running modules.
+
+    Alerts are identified by a hashable key (e.g. ("weapon", "knife")). A key
+    fires again only once its cooldown has passed since it last fired, which
+    is an O(1) dict lookup. Fired alerts go into a ring buffer of at most
+    max_alerts entries and expire after retention seconds, and keys whose
+    cooldown has run out are forgotten, so memory stays constant however long
+    the process runs.
+
+    cooldowns maps the first element of a key (its kind) to a cooldown in
+    seconds; other kinds use the default cooldown.
+    """
+
+    def __init__(self, retention=60.0, cooldown=30.0, cooldowns=None, max_alerts=100):
+        self.retention = retention
+        self.cooldown = cooldown
+        self.cooldowns = dict(cooldowns or {})
+        self.alerts = deque(maxlen=max_alerts)   # (time, key, message), oldest first
+        self._last_fired = OrderedDict()         # key -> time, least recently fired first
+        self._max_cooldown = max([cooldown, *self.cooldowns.values()])
+
+    def cooldown_for(self, key):
+        kind = key[0] if isinstance(key, tuple) else key
+        return self.cooldowns.get(kind, self.cooldown)
+
+    def add(self, key, message, now):
+        """Records the alert unless key is cooling down; returns True if it fired"""
+        self.prune(now)
+        last = self._last_fired.get(key)
+        if last is not None and now - last < self.cooldown_for(key):
+            return False
+        self._last_fired[key] = now
+        self._last_fired.move_to_end(key)
+        self.alerts.append((now, key, message))
+        return True
+
+    def prune(self, now):
+        while self.alerts and now - self.alerts[0][0] > self.retention:
+            self.alerts.popleft()
+        # Keys are ordered by last fire time, so expired ones are always at the front
+        while self._last_fired and now - next(iter(self._last_fired.values())) >= self._max_cooldown:
+            self._last_fired.popitem(last=False)
+
+    def recent(self, now, limit=None):
+        """Messages of the alerts still within the retention window, oldest first"""
+        self.prune(now)
+        messages = [message for _, _, message in self.alerts]
+        return messages[-limit:] if limit else messages
+
+    def __len__(self):
+        return len(self.alerts)
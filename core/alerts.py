@@ -0,0 +1,216 @@
+# core/alerts.py
+import json
+import platform
+import queue
+import sys
+import threading
+import time
+import urllib.request
+
+# Statuses that count towards an alert once they persist for alert_duration
+ALERT_STATUSES = {"distracted", "sleeping", "absent", "touching", "unattended", "alert"}
+
+_STOP = object()
+
+
+class AlertSink:
+    """Receives batches of alert dicts on the dispatcher's worker thread; may block"""
+
+    def send(self, alerts):
+        raise NotImplementedError("Sinks must implement send().")
+
+    def close(self):
+        pass
+
+
+class ConsoleSink(AlertSink):
+    def send(self, alerts):
+        for alert in alerts:
+            print(f"[{alert['timestamp']}] ⚠️ ALERT: CAMERA {alert['camera']} "
+                  f"{alert['module'].upper()} - {alert['details']}")
+
+
+class LogSink(AlertSink):
+    """Appends one JSON line per alert to path"""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def send(self, alerts):
+        for alert in alerts:
+            self.file.write(json.dumps(alert, default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class WebhookSink(AlertSink):
+    """POSTs each batch as a JSON list to url (e.g. a local notification relay)"""
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        request = urllib.request.Request(self.url, data=json.dumps(alerts, default=str).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class SoundSink(AlertSink):
+    """One beep per batch: winsound on Windows, the terminal bell elsewhere"""
+
+    def __init__(self, frequency=1000, duration_ms=400):
+        self.frequency = frequency
+        self.duration_ms = duration_ms
+
+    def send(self, alerts):
+        if platform.system() == "Windows":
+            import winsound
+            winsound.Beep(self.frequency, self.duration_ms)
+        else:
+            sys.stdout.write("\a")
+            sys.stdout.flush()
+
+
+class AlertDispatcher:
+    """
+    Non-blocking alert pipeline between the frame loop and slow notification sinks.
+
+    submit() is called for every module result. It keeps per-camera,
+    per-module debounce state: a result whose status is in ALERT_STATUSES
+    must persist for more than alert_duration seconds (on the frame clock)
+    before it fires, and fires once until the module reports a normal status
+    again. Fired alerts are queued without blocking; a worker thread gathers
+    them into batches of up to max_batch over batch_interval seconds, applies
+    a rate limit of rate_limit alerts per second (bursts up to burst, excess
+    alerts are dropped and counted) and hands each batch to every sink. A
+    failing sink is logged and does not affect the others.
+
+        dispatcher = AlertDispatcher([ConsoleSink(), SoundSink()])
+        dispatcher.start()
+        dispatcher.submit(result, timestamp, camera=0)
+        ...
+        dispatcher.stop()
+
+    Config keys:
+        alert_duration: seconds a status must persist before alerting (default 5)
+        batch_interval: seconds to gather alerts into one batch (default 0.5)
+        max_batch:      alerts per batch (default 50)
+        rate_limit:     sustained alerts per second passed to sinks, None for no limit (default 5)
+        burst:          alerts that may pass at once after a quiet period (default 20)
+        queue_size:     fired alerts buffered for the worker (default 1000)
+    """
+
+    def __init__(self, sinks, config=None):
+        self.sinks = list(sinks)
+        self.config = config or {}
+        self.alert_duration = self.config.get("alert_duration", 5)
+        self.batch_interval = self.config.get("batch_interval", 0.5)
+        self.max_batch = self.config.get("max_batch", 50)
+        self.rate_limit = self.config.get("rate_limit", 5)
+        self.burst = self.config.get("burst", 20)
+
+        self.queue = queue.Queue(self.config.get("queue_size", 1000))
+        self.timers = {}      # (camera, module) -> {"start": seconds, "alerted": bool}
+        self.dropped = 0      # alerts lost to a full queue or the rate limit
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._worker_loop, name="alert-dispatch", daemon=True)
+            self._worker.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Flushes queued alerts and closes the sinks"""
+        if self._worker is not None:
+            self.queue.put(_STOP)
+            self._worker.join(timeout=timeout)
+            self._worker = None
+        for sink in self.sinks:
+            sink.close()
+
+    def submit(self, result, timestamp, camera=0, now=None):
+        """
+        Updates debounce state for one module result; queues an alert if it fires.
+        now is the frame time in seconds and defaults to the wall clock for live cameras.
+        """
+        key = (camera, result["module"])
+        now = time.time() if now is None else now
+
+        if result["status"] not in ALERT_STATUSES:
+            self.timers[key] = {"start": now, "alerted": False}
+            return False
+
+        timer = self.timers.get(key)
+        if timer is None:
+            self.timers[key] = {"start": now, "alerted": False}
+            return False
+        if timer["alerted"] or now - timer["start"] <= self.alert_duration:
+            return False
+
+        timer["alerted"] = True
+        alert = {
+            "timestamp": timestamp,
+            "camera": camera,
+            "module": result["module"],
+            "status": result["status"],
+            "confidence": result.get("confidence"),
+            "details": result["details"],
+        }
+        try:
+            self.queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+        return True
+
+    def _take_tokens(self, wanted):
+        elapsed = time.monotonic() - self._refilled
+        self._refilled += elapsed
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate_limit)
+        granted = min(wanted, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+    def _next_batch(self):
+        """Blocks for the first alert, then gathers more for up to batch_interval; None once stopped"""
+        item = self.queue.get()
+        if item is _STOP:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.batch_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self.queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _worker_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            allowed = self._take_tokens(len(batch)) if self.rate_limit else len(batch)
+            self.dropped += len(batch) - allowed
+            if allowed:
+                self._deliver(batch[:allowed])
+
+    def _deliver(self, batch):
+        for sink in self.sinks:
+            try:
+                sink.send(batch)
+            except Exception as e:
+                print(f"[WARN] Alert sink {type(sink).__name__} failed: {e}")
@@ -0,0 +1,61 @@
+# core/annotation.py
+import cv2
+
+
+class AnnotationLayer:
+    """
+    Draw operations recorded by modules during analysis.
+
+    Modules never draw on the frame they analyse (inside the runners it is a
+    shared read-only view). Instead they record boxes, text and markers here,
+    and the runner composites every module's layer onto the frame once, at
+    render time, so no module needs a private copy of the frame:
+
+        canvas = annotation_layer(frame, context)
+        canvas.rectangle((x1, y1), (x2, y2), (0, 255, 0), 2)
+        ...
+        context.annotations.render(display_frame)
+
+    Recording is a list append, which is safe from the scheduler's parallel
+    inference threads.
+    """
+
+    def __init__(self):
+        self.ops = []
+
+    def _record(self, draw, *args):
+        self.ops.append((draw, args))
+
+    def rectangle(self, pt1, pt2, color, thickness=1):
+        self._record(cv2.rectangle, pt1, pt2, color, thickness)
+
+    def circle(self, center, radius, color, thickness=1):
+        self._record(cv2.circle, center, radius, color, thickness)
+
+    def text(self, text, org, scale, color, thickness=1, font=cv2.FONT_HERSHEY_SIMPLEX, line_type=cv2.LINE_8):
+        self._record(cv2.putText, text, org, font, scale, color, thickness, line_type)
+
+    def render(self, frame):
+        """Draws every recorded operation onto frame in place and returns it"""
+        for draw, args in self.ops:
+            draw(frame, *args)
+        return frame
+
+    def clear(self):
+        self.ops = []
+
+
+class ImmediateLayer(AnnotationLayer):
+    """Same interface, drawing straight onto a frame the caller owns (standalone module use)"""
+
+    def __init__(self, frame):
+        super().__init__()
+        self.frame = frame
+
+    def _record(self, draw, *args):
+        draw(self.frame, *args)
+
+
+def annotation_layer(frame, context=None):
+    """The context's shared layer inside a runner, else a layer drawing directly on frame"""
+    return context.annotations if context is not None else ImmediateLayer(frame)
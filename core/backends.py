@@ -0,0 +1,232 @@
+# core/backends.py
+import functools
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from core.model_cache import release_model, shared_model
+
+_OPENCV_BACKENDS = {
+    "default": cv2.dnn.DNN_BACKEND_DEFAULT,
+    "opencv": cv2.dnn.DNN_BACKEND_OPENCV,
+    "inference_engine": cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE,
+    "cuda": cv2.dnn.DNN_BACKEND_CUDA,
+}
+_OPENCV_TARGETS = {
+    "cpu": cv2.dnn.DNN_TARGET_CPU,
+    "opencl": cv2.dnn.DNN_TARGET_OPENCL,
+    "opencl_fp16": cv2.dnn.DNN_TARGET_OPENCL_FP16,
+    "cuda": cv2.dnn.DNN_TARGET_CUDA,
+    "cuda_fp16": cv2.dnn.DNN_TARGET_CUDA_FP16,
+}
+
+
+def int8_path(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}.int8{ext}"
+
+
+def prequantized(path, provider):
+    """The *.int8 sibling of path, which must have been prepared ahead of time"""
+    quantized = int8_path(path)
+    if not os.path.exists(quantized):
+        raise FileNotFoundError(f"{provider}: int8 needs a pre-quantized model at {quantized}")
+    return quantized
+
+
+def quantize_onnx(path):
+    """Dynamic INT8 weight quantization of an ONNX model, cached next to it as *.int8.onnx"""
+    quantized = int8_path(path)
+    if not os.path.exists(quantized):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(path, quantized, weight_type=QuantType.QInt8)
+    return quantized
+
+
+class InferenceBackend:
+    """
+    A loaded network that maps an NCHW float32 blob to its raw output.
+
+    Spec keys (shared by all providers):
+        provider: "opencv", "onnxruntime" or "torch"
+        model:    weights file (.caffemodel/.onnx for OpenCV, .onnx for ONNX Runtime,
+                  TorchScript .pt for torch)
+        config:   OpenCV only, e.g. the Caffe .prototxt
+        threads:  intra-op thread count (default: library default)
+        int8:     use INT8 quantized weights (default False); model always names
+                  the float model, see each provider for where the INT8 one comes from
+
+    One backend is shared by every module instance with the same spec, on any
+    thread (a camera's live inference, another's preload warm-up), so
+    forward() is serialized per network: OpenCV's setInput()+forward() in
+    particular must run as one step.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "forward" in cls.__dict__:
+            forward = cls.__dict__["forward"]
+
+            @functools.wraps(forward)
+            def locked_forward(self, blob):
+                with self._forward_lock:
+                    return forward(self, blob)
+            cls.forward = locked_forward
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.threads = spec.get("threads")
+        self.int8 = spec.get("int8", False)
+        self._forward_lock = threading.RLock()  # reentrant: a subclass may call super().forward()
+
+    def forward(self, blob: np.ndarray) -> np.ndarray:
+        raise NotImplementedError("Backends must implement forward().")
+
+
+class OpenCVBackend(InferenceBackend):
+    """
+    cv2.dnn with a selectable backend/target (spec keys "backend", default "opencv",
+    and "target", default "cpu"). OpenCV has no on-the-fly quantization: with
+    int8, model names the float ONNX model and its *.int8.onnx sibling (e.g. one
+    produced by quantize_onnx) is loaded. Caffe models cannot be used with int8.
+    """
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        model = spec["model"]
+        if self.int8:
+            if os.path.splitext(model)[1].lower() != ".onnx":
+                raise ValueError(f"opencv: int8 needs an ONNX model, got {model}")
+            model = prequantized(model, "opencv")
+        self.net = cv2.dnn.readNet(model, spec.get("config", ""))
+        self.net.setPreferableBackend(_OPENCV_BACKENDS[spec.get("backend", "opencv")])
+        self.net.setPreferableTarget(_OPENCV_TARGETS[spec.get("target", "cpu")])
+        if self.threads:
+            # OpenCV's thread pool is process-wide
+            cv2.setNumThreads(int(self.threads))
+
+    def forward(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward()
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime on the CPU execution provider; int8 quantizes the model once on first load."""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        import onnxruntime as ort
+
+        model = quantize_onnx(spec["model"]) if self.int8 else spec["model"]
+        options = ort.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = int(self.threads)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def forward(self, blob):
+        return self.session.run(None, {self.input_name: blob.astype(np.float32, copy=False)})[0]
+
+
+class TorchBackend(InferenceBackend):
+    """
+    TorchScript model. Dynamic quantization does not apply to a loaded
+    ScriptModule (and the SSD nets have no Linear layers to quantize), so with
+    int8 the model's *.int8 sibling, quantized and scripted ahead of time, is
+    loaded instead.
+    """
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        import torch
+
+        self.torch = torch
+        if self.threads:
+            torch.set_num_threads(int(self.threads))
+        model = prequantized(spec["model"], "torch") if self.int8 else spec["model"]
+        self.model = torch.jit.load(model, map_location="cpu").eval()
+
+    def forward(self, blob):
+        with self.torch.inference_mode():
+            return self.model(self.torch.from_numpy(blob)).numpy()
+
+
+PROVIDERS = {
+    "opencv": OpenCVBackend,
+    "onnxruntime": OnnxRuntimeBackend,
+    "torch": TorchBackend,
+}
+
+
+def network_key(spec):
+    return ("network",) + tuple(sorted((k, str(v)) for k, v in spec.items()))
+
+
+def load_network(spec):
+    """Loads (or reuses, via core.model_cache) the network described by spec."""
+    provider = spec.get("provider", "opencv")
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown inference provider: {provider}")
+    return shared_model(network_key(spec), lambda: PROVIDERS[provider](spec))
+
+
+def release_network(spec):
+    """Hands back a load_network() reference; the network is unloaded once every holder has released it"""
+    release_model(network_key(spec))
+
+
+YOLO_EXPORT_FORMATS = {"onnxruntime": "onnx", "openvino": "openvino", "torchscript": "torchscript"}
+YOLO_EXPORT_SUFFIXES = {"onnx": ".onnx", "torchscript": ".torchscript", "openvino": "_openvino_model"}
+
+
+def load_yolo(weights, provider="torch", threads=None, int8=False, warmup=True, task="detect", download=True):
+    """
+    Loads an ultralytics YOLO model on the chosen provider.
+
+    "torch" runs the .pt weights directly. "onnxruntime", "openvino" and
+    "torchscript" export the weights next to the checkpoint (exports are
+    reused once present) and load the exported model. int8 requests INT8
+    weights: OpenVINO exports are calibrated by ultralytics, ONNX exports are
+    dynamically quantized. threads sets torch's intra-op thread count. A
+    warm-up pass runs so the first real frame does not pay for lazy
+    initialisation. With download=False, missing weights raise
+    FileNotFoundError instead of being fetched by ultralytics.
+    """
+    def require(path):
+        if not download and not os.path.exists(path):
+            raise FileNotFoundError(f"YOLO weights not found: {path} (place them there, or allow downloading)")
+
+    def load():
+        from ultralytics import YOLO
+
+        if threads:
+            import torch
+            torch.set_num_threads(int(threads))
+
+        if provider == "torch":
+            require(weights)
+            if not os.path.exists(weights):
+                print(f"[INFO] {weights} not found, downloading weights")
+            model = YOLO(weights, task=task)
+        else:
+            export_format = YOLO_EXPORT_FORMATS[provider]
+            suffix = YOLO_EXPORT_SUFFIXES[export_format]
+            if int8 and export_format == "openvino":
+                suffix = "_int8" + suffix
+            exported = os.path.splitext(weights)[0] + suffix
+            if not os.path.exists(exported):
+                require(weights)
+                exported = YOLO(weights, task=task).export(format=export_format,
+                                                           int8=int8 and export_format == "openvino")
+            if int8 and export_format == "onnx":
+                exported = quantize_onnx(exported)
+            model = YOLO(exported, task=task)
+
+        if warmup:
+            model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+        return model
+
+    return shared_model(("yolo", weights, provider, threads, int8, task), load)
@@ -0,0 +1,33 @@
+# core/batching.py
+import cv2
+
+
+def batch_blob(frames, contexts, scalefactor, size, mean):
+    """
+    Builds one NCHW blob for a batch of frames.
+
+    Uses the per-frame FrameContext caches when available so a frame that was
+    already resized (or blobbed, for a batch of one) by another module is not
+    resized again.
+    """
+    if contexts is not None:
+        if len(contexts) == 1:
+            return contexts[0].blob(scalefactor, size, mean)
+        images = [context.resized(size) for context in contexts]
+    else:
+        images = frames
+    return cv2.dnn.blobFromImages(images, scalefactor, size, mean)
+
+
+def split_ssd_detections(detections, batch_size):
+    """
+    Splits the output of an SSD forward pass over a batch into per-image arrays.
+
+    Caffe SSD nets return a single (1, 1, K, 7) array for the whole batch with
+    the image index in column 0. Each returned array keeps the same
+    (1, 1, k, 7) layout as a batch-of-one forward pass.
+    """
+    if batch_size == 1:
+        return [detections]
+    image_ids = detections[0, 0, :, 0].astype(int)
+    return [detections[:, :, image_ids == i, :] for i in range(batch_size)]
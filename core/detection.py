@@ -0,0 +1,181 @@
+# core/detection.py
+import numpy as np
+
+from core.backends import load_yolo
+
+
+class Detections:
+    """
+    Typed detections for one frame.
+
+    boxes:     (N, 4) float32 x1, y1, x2, y2 in frame pixels
+    scores:    (N,) float32 confidences
+    class_ids: (N,) int class indices into names
+    names:     dict of class index -> class name
+    keypoints: optional (N, K, 2) float32 pose keypoints, NaN for rows without a pose
+    """
+
+    def __init__(self, boxes, scores, class_ids, names, keypoints=None):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        self.class_ids = np.asarray(class_ids, dtype=int).reshape(-1)
+        self.names = names
+        self.keypoints = keypoints
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @property
+    def labels(self):
+        return [self.names[class_id] for class_id in self.class_ids]
+
+    def class_ids_for(self, classes):
+        return [class_id for class_id, name in self.names.items() if name in classes]
+
+    def mask(self, classes):
+        return np.isin(self.class_ids, self.class_ids_for(classes))
+
+    def subset(self, mask):
+        keypoints = self.keypoints[mask] if self.keypoints is not None else None
+        return Detections(self.boxes[mask], self.scores[mask], self.class_ids[mask], self.names, keypoints)
+
+    def select(self, classes, min_score=0.0):
+        """Only the rows whose class name is in classes and whose score exceeds min_score"""
+        return self.subset(self.mask(classes) & (self.scores > min_score))
+
+    @staticmethod
+    def concat(parts, names):
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return Detections(np.zeros((0, 4)), [], [], names)
+        keypoints = None
+        if any(part.keypoints is not None for part in parts):
+            k = max(part.keypoints.shape[1] for part in parts if part.keypoints is not None)
+            keypoints = np.concatenate([
+                part.keypoints if part.keypoints is not None
+                else np.full((len(part), k, 2), np.nan, dtype=np.float32)
+                for part in parts
+            ])
+        return Detections(np.concatenate([part.boxes for part in parts]),
+                          np.concatenate([part.scores for part in parts]),
+                          np.concatenate([part.class_ids for part in parts]),
+                          names, keypoints)
+
+    @classmethod
+    def from_ultralytics(cls, result):
+        """Converts one ultralytics Results object, moving each tensor to the host once"""
+        names = dict(result.names) if not isinstance(result.names, (list, tuple)) else dict(enumerate(result.names))
+        data = result.boxes.data.cpu().numpy()
+        keypoints = None
+        if getattr(result, "keypoints", None) is not None:
+            keypoints = result.keypoints.xy.cpu().numpy().astype(np.float32)
+        return cls(data[:, :4], data[:, 4], data[:, 5], names, keypoints)
+
+    @classmethod
+    def from_ssd(cls, detections, w, h, names):
+        """Converts a (1, 1, K, 7) Caffe SSD output for a w x h frame"""
+        rows = detections[0, 0]
+        return cls(rows[:, 3:7] * np.array([w, h, w, h]), rows[:, 2], rows[:, 1], names)
+
+
+class DetectionService:
+    """
+    One shared person/object detector for every module on a frame.
+
+    Modules declare what they need with class attributes:
+
+        DETECTION_CLASSES = {"person", "backpack"}   # class names to receive
+        DETECTION_FIELDS = {"boxes", "keypoints"}    # "keypoints" only if pose is needed
+
+    and read the result from FrameContext.detections, which runs the service
+    at most once per frame. A general COCO detector provides boxes for every
+    subscribed class; if any subscriber needs keypoints, person rows come from
+    a pose model instead, so at most two forward passes are made per frame
+    regardless of how many modules subscribe.
+
+    Config keys:
+        detector_weights: COCO detection weights (default "yolov8n.pt")
+        pose_weights:     pose weights used when keypoints are requested (default "yolov8n-pose.pt")
+        min_score:        confidence floor applied by the models (default 0.25)
+        provider:         core.backends YOLO provider, "torch" (default), "onnxruntime",
+                          "openvino" or "torchscript"
+        threads:          intra-op thread count for the models
+        int8:             load INT8 quantized weights (default False)
+    """
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.detector_weights = self.config.get("detector_weights", "yolov8n.pt")
+        self.pose_weights = self.config.get("pose_weights", "yolov8n-pose.pt")
+        self.min_score = self.config.get("min_score", 0.25)
+        self.provider = self.config.get("provider", "torch")
+        self.threads = self.config.get("threads")
+        self.int8 = self.config.get("int8", False)
+
+        self.classes = set()
+        self.fields = {"boxes"}
+        self._detector = None
+        self._pose = None
+
+    def subscribe(self, module):
+        classes = getattr(module, "DETECTION_CLASSES", None)
+        if not classes:
+            return False
+        self.classes |= set(classes)
+        self.fields |= set(getattr(module, "DETECTION_FIELDS", {"boxes"}))
+        return True
+
+    @property
+    def needs_keypoints(self):
+        return "keypoints" in self.fields and "person" in self.classes
+
+    def _load(self, weights, task="detect"):
+        return load_yolo(weights, self.provider, self.threads, self.int8, task=task)
+
+    def detect_batch(self, frames):
+        """Runs the shared models once over a batch of frames; one Detections per frame"""
+        if self._detector is None:
+            self._detector = self._load(self.detector_weights)
+        outputs = [Detections.from_ultralytics(r)
+                   for r in self._detector(list(frames), conf=self.min_score, verbose=False)]
+
+        if self.needs_keypoints:
+            if self._pose is None:
+                self._pose = self._load(self.pose_weights, task="pose")
+            poses = [Detections.from_ultralytics(r)
+                     for r in self._pose(list(frames), conf=self.min_score, verbose=False)]
+            outputs = [self._merge_pose(detections, pose) for detections, pose in zip(outputs, poses)]
+
+        return [detections.select(self.classes) for detections in outputs]
+
+    def _merge_pose(self, detections, pose):
+        # Person rows (with keypoints) come from the pose model, everything else from the detector
+        names = detections.names
+        person_id = detections.class_ids_for({"person"})
+        pose_persons = Detections(pose.boxes, pose.scores,
+                                  np.full(len(pose), person_id[0] if person_id else 0), names, pose.keypoints)
+        return Detections.concat([detections.subset(~detections.mask({"person"})), pose_persons], names)
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def prefetch(self, contexts):
+        """Fills FrameContext.detections for every context that lacks it, in one batch"""
+        missing = [context for context in contexts if not context.has("detections")]
+        if missing:
+            for context, detections in zip(missing, self.detect_batch([context.frame for context in missing])):
+                context.put("detections", detections)
+        return [context.detections for context in contexts]
+
+
+def shared_detections(contexts):
+    """
+    Detections from the shared service for each context, batched across
+    contexts; None when there are no contexts or any lacks a service, in
+    which case the module should run its own model.
+    """
+    if not contexts or any(context is None or context.detector is None for context in contexts):
+        return None
+    if len(contexts) == 1:
+        return [contexts[0].detections]
+    return contexts[0].detector.prefetch(contexts)
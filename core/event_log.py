@@ -0,0 +1,227 @@
+# core/event_log.py
+import glob
+import json
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+MAGIC = b"EVB1"
+SUFFIX = ".evlog"
+
+# Fixed-width columns of a block, in on-disk order
+NUMERIC_COLUMNS = [("time", np.float64), ("confidence", np.float32),
+                   ("camera", np.uint16), ("module", np.uint16), ("status", np.uint16)]
+# Dictionary-encoded columns: a per-block string table plus one uint16 code per row
+CATEGORICAL_COLUMNS = ["camera", "module", "status"]
+# Variable-length UTF-8 columns: uint32 end offsets plus the concatenated bytes
+TEXT_COLUMNS = ["timestamp", "details"]
+
+
+def _encode_text(values):
+    encoded = [value.encode("utf-8") for value in values]
+    ends = np.cumsum([len(value) for value in encoded], dtype=np.uint32)
+    return ends, b"".join(encoded)
+
+
+def _decode_text(ends, data):
+    starts = np.concatenate([[0], ends[:-1]]).astype(np.int64)
+    return [data[start:end].decode("utf-8") for start, end in zip(starts, ends)]
+
+
+class EventLog:
+    """
+    Buffered, append-only columnar log of module results.
+
+    Results are buffered in memory and written as blocks: a small JSON header
+    (row count, time range, string tables) followed by one contiguous array
+    per column. Camera, module and status are dictionary-encoded to uint16
+    codes; timestamp and details are stored as offsets plus UTF-8 bytes.
+    Blocks are encoded and written by a background writer thread every
+    flush_interval seconds, or as soon as flush_rows results are buffered, so
+    the frame loop only appends to lists and never waits on the disk. Files
+    are rotated once they exceed rotate_bytes or are older than
+    rotate_interval seconds.
+
+        log = EventLog("event_logs")
+        log.append(result, timestamp, camera=0, now=context.time)
+        ...
+        log.close()
+
+    query() scans a directory for a time range, skipping whole blocks by their
+    header without decoding them.
+    """
+
+    def __init__(self, directory, flush_rows=4096, flush_interval=5.0,
+                 rotate_bytes=64 * 1024 * 1024, rotate_interval=3600.0):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._columns = {name: [] for name in ["time", "confidence", *CATEGORICAL_COLUMNS, *TEXT_COLUMNS]}
+        self._lock = threading.Lock()        # the buffered columns
+        self._write_lock = threading.Lock()  # the file; held while a block is encoded and written
+        self._file = None
+        self._opened = 0.0
+
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(target=self._writer_loop, name="event-log", daemon=True)
+        self._writer.start()
+
+    def __len__(self):
+        return len(self._columns["time"])
+
+    def append(self, result, timestamp, camera=0, now=None):
+        """Buffers one module result; now is the frame time in seconds (default: wall clock)"""
+        with self._lock:
+            columns = self._columns
+            columns["time"].append(time.time() if now is None else now)
+            columns["confidence"].append(float(result.get("confidence") or 0.0))
+            columns["camera"].append(str(camera))
+            columns["module"].append(str(result.get("module", "")))
+            columns["status"].append(str(result.get("status", "")))
+            columns["timestamp"].append(str(timestamp or ""))
+            columns["details"].append(str(result.get("details", "")))
+            due = len(columns["time"]) >= self.flush_rows
+        if due:
+            self._wake.set()
+
+    def extend(self, results, timestamp, camera=0, now=None):
+        for result in results:
+            self.append(result, timestamp, camera, now)
+
+    def _open(self):
+        name = datetime.now().strftime("events-%Y%m%d-%H%M%S-%f") + SUFFIX
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._opened = time.monotonic()
+
+    def _rotate_due(self):
+        return (self._file is None
+                or self._file.tell() >= self.rotate_bytes
+                or time.monotonic() - self._opened >= self.rotate_interval)
+
+    def _writer_loop(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes everything buffered so far as one block"""
+        with self._write_lock:
+            with self._lock:
+                columns, self._columns = self._columns, {name: [] for name in self._columns}
+            if not columns["time"]:
+                return
+            block = self._encode(columns)
+            if self._rotate_due():
+                if self._file is not None:
+                    self._file.close()
+                self._open()
+            self._file.write(block)
+            self._file.flush()
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @staticmethod
+    def _encode(columns):
+        times = np.asarray(columns["time"], dtype=np.float64)
+        header = {"rows": len(times), "t0": float(times.min()), "t1": float(times.max())}
+        arrays = {"time": times, "confidence": np.asarray(columns["confidence"], dtype=np.float32)}
+        for name in CATEGORICAL_COLUMNS:
+            table, codes = np.unique(np.asarray(columns[name]), return_inverse=True)
+            header[name] = table.tolist()
+            arrays[name] = codes.astype(np.uint16)
+
+        parts = [arrays[name].astype(dtype, copy=False).tobytes() for name, dtype in NUMERIC_COLUMNS]
+        for name in TEXT_COLUMNS:
+            ends, data = _encode_text(columns[name])
+            header[f"{name}_bytes"] = len(data)
+            parts += [ends.tobytes(), data]
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        return b"".join([MAGIC, struct.pack("<II", len(header_bytes), sum(len(part) for part in parts)),
+                         header_bytes, *parts])
+
+
+def _read_blocks(path):
+    """
+    Yields (header, body bytes reader) for every block of one log file. Reading
+    stops at a block cut short, e.g. by a process killed during flush().
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        while True:
+            prefix = f.read(len(MAGIC) + 8)
+            if len(prefix) < len(MAGIC) + 8 or prefix[:len(MAGIC)] != MAGIC:
+                return
+            header_len, body_len = struct.unpack("<II", prefix[len(MAGIC):])
+            if f.tell() + header_len + body_len > size:
+                return
+            header = json.loads(f.read(header_len))
+            yield header, f, body_len
+
+
+def _decode_block(header, body):
+    rows = header["rows"]
+    offset = 0
+    columns = {}
+    for name, dtype in NUMERIC_COLUMNS:
+        size = rows * np.dtype(dtype).itemsize
+        columns[name] = np.frombuffer(body, dtype=dtype, count=rows, offset=offset)
+        offset += size
+    for name in CATEGORICAL_COLUMNS:
+        columns[name] = np.asarray(header[name], dtype=object)[columns[name]] if rows else np.array([], dtype=object)
+    for name in TEXT_COLUMNS:
+        ends = np.frombuffer(body, dtype=np.uint32, count=rows, offset=offset)
+        offset += ends.nbytes
+        data = body[offset:offset + header[f"{name}_bytes"]]
+        offset += len(data)
+        columns[name] = np.asarray(_decode_text(ends, data), dtype=object)
+    return columns
+
+
+def query(directory, start=None, end=None, camera=None, module=None, status=None):
+    """
+    Results logged in [start, end] (seconds, either bound optional) as a dict
+    of column arrays: time, confidence, camera, module, status, timestamp,
+    details. camera, module and status optionally filter on exact values.
+    """
+    names = ["time", "confidence", *CATEGORICAL_COLUMNS, *TEXT_COLUMNS]
+    parts = {name: [] for name in names}
+    for path in sorted(glob.glob(os.path.join(directory, "*" + SUFFIX))):
+        for header, f, body_len in _read_blocks(path):
+            if (start is not None and header["t1"] < start) or (end is not None and header["t0"] > end) \
+                    or (camera is not None and str(camera) not in header["camera"]) \
+                    or (module is not None and module not in header["module"]) \
+                    or (status is not None and status not in header["status"]):
+                f.seek(body_len, os.SEEK_CUR)
+                continue
+            columns = _decode_block(header, f.read(body_len))
+            keep = np.ones(header["rows"], dtype=bool)
+            if start is not None:
+                keep &= columns["time"] >= start
+            if end is not None:
+                keep &= columns["time"] <= end
+            for name, value in (("camera", camera), ("module", module), ("status", status)):
+                if value is not None:
+                    keep &= columns[name] == str(value)
+            for name in names:
+                parts[name].append(columns[name][keep])
+
+    return {name: np.concatenate(values) if values else np.array([]) for name, values in parts.items()}
@@ -0,0 +1,131 @@
+# core/frame_context.py
+import threading
+import time
+
+import cv2
+
+from core import metrics
+from core.annotation import AnnotationLayer
+
+_wall_time = time.time
+
+# Set while this thread computes a cache entry, so entries built from other
+# entries (blob from resized, thumbnail from gray) are timed only once
+_computing = threading.local()
+
+
+class FrameContext:
+    """
+    Per-frame preprocessing cache shared by every module that sees the frame.
+
+    Derived images (grayscale, thumbnails, resized copies and DNN blobs) are
+    computed lazily on first access and memoized, so each is built at most
+    once per frame no matter how many modules ask for it.
+
+    frame is a read-only view of the captured image: modules analyse it
+    without copying and record their drawings in annotations, which the
+    runner composites onto the original image once, at render time. The
+    cached images are shared as well and must also be treated as read-only.
+    The grayscale buffer of the frame two steps back is recycled for this
+    frame's gray, so nothing may keep a reference to gray beyond the next frame.
+
+    time is the frame's position in seconds on the clock modules should use
+    for duration rules: wall-clock time for live cameras, media time when
+    replaying a file faster (or slower) than realtime.
+
+    detector is an optional core.detection.DetectionService; when set,
+    detections runs it once for this frame on first access.
+    """
+
+    def __init__(self, frame, timestamp=None, prev=None, time=None, detector=None):
+        self.frame = frame.view()
+        self.frame.flags.writeable = False
+        self.annotations = AnnotationLayer()
+        self.timestamp = timestamp
+        self.time = time if time is not None else _wall_time()
+        self.detector = detector
+        self.prev = prev
+        self._cache = {}
+        # One lock per cache key, so a slow entry (the shared detection pass) only
+        # blocks threads waiting for that same entry; _lock guards the lock table
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._gray_buffer = None
+
+        # Only the immediately preceding frame is ever needed; the one before it
+        # hands over its grayscale buffer
+        if prev is not None:
+            if prev.prev is not None:
+                self._gray_buffer = prev.prev._cache.get("gray")
+            prev.prev = None
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _get(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            with self._key_lock(key):
+                value = self._cache.get(key)
+                if value is None:
+                    if getattr(_computing, "active", False):
+                        value = compute()
+                    else:
+                        # Shared work is charged to whichever module asked for it first
+                        _computing.active = True
+                        try:
+                            with metrics.stage("inference" if key == "detections" else "preprocess"):
+                                value = compute()
+                        finally:
+                            _computing.active = False
+                    self._cache[key] = value
+        return value
+
+    def has(self, key):
+        return key in self._cache
+
+    def put(self, key, value):
+        with self._key_lock(key):
+            self._cache.setdefault(key, value)
+
+    @property
+    def detections(self):
+        """Shared core.detection.Detections for this frame, or None without a detector"""
+        if self.detector is None:
+            return None
+        return self._get("detections", lambda: self.detector.detect(self.frame))
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    @property
+    def gray(self):
+        def compute():
+            buffer = self._gray_buffer
+            self._gray_buffer = None
+            if buffer is not None and buffer.shape == self.frame.shape[:2]:
+                return cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY, dst=buffer)
+            return cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._get("gray", compute)
+
+    def thumbnail(self, width=160):
+        """Small grayscale copy for cheap whole-scene comparisons."""
+        def compute():
+            h, w = self.gray.shape[:2]
+            height = max(1, round(h * width / w))
+            return cv2.resize(self.gray, (width, height), interpolation=cv2.INTER_AREA)
+        return self._get(("thumbnail", width), compute)
+
+    def resized(self, size):
+        """Frame resized to (width, height)."""
+        return self._get(("resized", size), lambda: cv2.resize(self.frame, size))
+
+    def blob(self, scalefactor, size, mean):
+        """Equivalent of cv2.dnn.blobFromImage(frame, scalefactor, size, mean)."""
+        mean_key = tuple(mean) if isinstance(mean, (list, tuple)) else mean
+        return self._get(
+            ("blob", scalefactor, size, mean_key),
+            lambda: cv2.dnn.blobFromImage(self.resized(size), scalefactor, size, mean),
+        )
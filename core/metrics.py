@@ -0,0 +1,259 @@
+# core/metrics.py
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, float("inf"))
+
+_local = threading.local()
+
+
+class Timer:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def observe(self, seconds):
+        ms = seconds * 1000.0
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (approximate, in ms)"""
+        if not self.count:
+            return 0.0
+        target = self.count * q / 100.0
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= target:
+                return self.max if bound == float("inf") else bound
+        return self.max
+
+
+class MetricsRegistry:
+    """
+    In-process counters and stage timers keyed by (camera, module).
+
+    Timers hold a count, total, max and a fixed bucket histogram, so recording
+    a sample is a few additions under one lock and memory does not grow with
+    uptime. Stages: "total" (a whole run/run_batch call), "preprocess" (shared
+    FrameContext computations), "inference" (forward_batch), "postprocess" and
+    "draw" (compositing annotations at render time). Counters: "processed",
+    "skipped" (motion gate reused a result), "errored" and "dropped" (frames
+    discarded by a scheduler queue).
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def observe(self, camera, module, stage, seconds):
+        with self._lock:
+            timer = self.timers.get((camera, module, stage))
+            if timer is None:
+                timer = self.timers[(camera, module, stage)] = Timer()
+            timer.observe(seconds)
+
+    def count(self, camera, module, name, n=1):
+        with self._lock:
+            key = (camera, module, name)
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            timers = {key: (t.count, t.total, t.max, t.percentile(50), t.percentile(95), t.percentile(99))
+                      for key, t in self.timers.items()}
+            return timers, dict(self.counters)
+
+    def render_text(self):
+        """Plain-text exposition, one metric per line (Prometheus text format)"""
+        timers, counters = self.snapshot()
+        lines = [f"uptime_seconds {time.time() - self.started:.1f}"]
+        for (camera, module, stage), (count, total, peak, p50, p95, p99) in sorted(timers.items(), key=str):
+            labels = f'camera="{camera}",module="{module}",stage="{stage}"'
+            lines += [f"stage_ms_count{{{labels}}} {count}",
+                      f"stage_ms_sum{{{labels}}} {total:.3f}",
+                      f"stage_ms_max{{{labels}}} {peak:.3f}",
+                      f'stage_ms{{{labels},quantile="0.5"}} {p50}',
+                      f'stage_ms{{{labels},quantile="0.95"}} {p95}',
+                      f'stage_ms{{{labels},quantile="0.99"}} {p99}']
+        for (camera, module, name), value in sorted(counters.items(), key=str):
+            lines.append(f'frames_{name}_total{{camera="{camera}",module="{module}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """One line per camera/module: frames, mean and p95 of the total stage"""
+        timers, counters = self.snapshot()
+        lines = []
+        for (camera, module, stage), (count, total, _, _, p95, _) in sorted(timers.items(), key=str):
+            if stage != "total":
+                continue
+            processed = counters.get((camera, module, "processed"), 0)
+            skipped = counters.get((camera, module, "skipped"), 0)
+            errored = counters.get((camera, module, "errored"), 0)
+            lines.append(f"camera {camera} {module}: {processed} processed, {skipped} skipped, {errored} errored, "
+                         f"mean {total / count if count else 0:.1f}ms, p95 <= {p95}ms")
+        for (camera, module, name), value in sorted(counters.items(), key=str):
+            if name == "dropped":
+                lines.append(f"camera {camera}: {value} frames dropped")
+        return lines
+
+
+registry = MetricsRegistry()
+
+
+def module_labels(module):
+    return getattr(module, "camera", None), type(module).__name__
+
+
+def _charge(stage, seconds, modules):
+    """Splits seconds of one stage evenly across the modules it was done for"""
+    share = seconds / len(modules)
+    for module in modules:
+        registry.observe(*module_labels(module), stage, share)
+
+
+class _Stage:
+    """Context manager timing one stage of the module(s) running on this thread"""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        modules = getattr(_local, "modules", None)
+        if modules:
+            _charge(self.stage, time.perf_counter() - self.start, modules)
+        return False
+
+
+def stage(name):
+    """with metrics.stage("preprocess"): ... attributes the time to the module currently running"""
+    return _Stage(name)
+
+
+class _Attribution:
+    __slots__ = ("modules", "outer")
+
+    def __init__(self, modules):
+        self.modules = list(modules)
+
+    def __enter__(self):
+        self.outer, _local.modules = getattr(_local, "modules", None), self.modules
+        return self
+
+    def __exit__(self, *exc):
+        _local.modules = self.outer
+        return False
+
+
+def attribute(modules):
+    """
+    with metrics.attribute(instances): ... charges stages timed inside the
+    block to those modules, split evenly when one batched call serves several
+    """
+    return _Attribution(modules)
+
+
+def record_entry(module, seconds, result):
+    """Records one run()/run_batch()-equivalent call: its total time and its results as processed/errored"""
+    labels = module_labels(module)
+    registry.observe(*labels, "total", seconds)
+    results = result if isinstance(result, list) else [result]
+    errors = sum(1 for r in results if isinstance(r, dict) and r.get("status") == "error")
+    registry.count(*labels, "processed", len(results) - errors)
+    if errors:
+        registry.count(*labels, "errored", errors)
+
+
+def timed_entry(method):
+    """
+    Wraps run()/run_batch(): times the outermost call as "total", counts its
+    frames as processed and any error results or exceptions as errored, and
+    marks the module as current so nested stages are attributed to it.
+    """
+    @functools.wraps(method)
+    def wrapper(self, frames_or_frame, *args, **kwargs):
+        if getattr(_local, "modules", None) == [self]:
+            return method(self, frames_or_frame, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            with attribute([self]):
+                result = method(self, frames_or_frame, *args, **kwargs)
+        except Exception:
+            registry.count(*module_labels(self), "errored")
+            raise
+        record_entry(self, time.perf_counter() - start, result)
+        return result
+    return wrapper
+
+
+def timed_stage(name):
+    """Decorator timing a module method as stage name, split across a batch's modules"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                modules = getattr(_local, "modules", None)
+                _charge(name, time.perf_counter() - start, modules if modules and self in modules else [self])
+        return wrapper
+    return decorate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = registry.render_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=9100, host="127.0.0.1"):
+    """Serves the registry as text on http://host:port/metrics from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def log_periodically(interval=60.0, stop_event=None):
+    """Prints registry.summary() every interval seconds from a daemon thread"""
+    stop_event = stop_event or threading.Event()
+
+    def loop():
+        while not stop_event.wait(interval):
+            for line in registry.summary():
+                print(f"[METRICS] {line}")
+
+    threading.Thread(target=loop, name="metrics-log", daemon=True).start()
+    return stop_event
@@ -0,0 +1,39 @@
+# core/model_cache.py
+import threading
+
+_models = {}
+_refs = {}
+_lock = threading.Lock()
+
+
+def shared_model(key, loader):
+    """
+    Returns the process-wide model registered under key, calling loader() to
+    create it on first use.
+
+    Every module instance (one per camera stream) that asks for the same key
+    gets the same network object, so weights are loaded once per process
+    rather than once per camera. Callers must not run a shared network from
+    several threads at the same time.
+
+    Each call takes a reference; callers that unload models when idle hand
+    it back with release_model().
+    """
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model = loader()
+            _models[key] = model
+        _refs[key] = _refs.get(key, 0) + 1
+    return model
+
+
+def release_model(key):
+    """Drops one reference; the model leaves the cache when the last one is released"""
+    with _lock:
+        refs = _refs.get(key, 0) - 1
+        if refs > 0:
+            _refs[key] = refs
+        else:
+            _refs.pop(key, None)
+            _models.pop(key, None)
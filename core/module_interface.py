@@ -2,14 +2,50 @@
 # core/module_interface.py
 import numpy as np
 
+from core import metrics
+from core.zones import ZoneMap
+
 class MonitoringModule:
+    # Heavy detectors set this so core.motion_gate.MotionGate may reuse their
+    # last result while the scene is static
+    MOTION_GATED = False
+
+    # The "module" value of this module's results; runners label error results with it
+    # so they share the module's alert debounce and event log entries
+    RESULT_NAME = None
+
+    # Set by the runners to label this instance's metrics
+    camera = None
+
+    def __init_subclass__(cls, **kwargs):
+        # Every module is instrumented through core.metrics without touching its code
+        super().__init_subclass__(**kwargs)
+        for name in ("run", "run_batch"):
+            if name in cls.__dict__:
+                setattr(cls, name, metrics.timed_entry(cls.__dict__[name]))
+        for name, stage in (("forward_batch", "inference"), ("postprocess", "postprocess")):
+            if name in cls.__dict__:
+                setattr(cls, name, metrics.timed_stage(stage)(cls.__dict__[name]))
+
     def __init__(self, config=None):
         self.config = config or {}
+        # zones: optional {name: polygon} for this camera, shared by every zone-scoped rule
+        zones = self.config.get("zones")
+        self.zones = ZoneMap(zones, self.config.get("zone_scale", 0.25)) if zones else None
 
-    def run(self, frame: np.ndarray, timestamp: str = None) -> dict:
+    @metrics.timed_entry
+    def run(self, frame: np.ndarray, timestamp: str = None, context=None) -> dict:
         """
         Processes a video frame and returns detection results.
 
+        context is an optional core.frame_context.FrameContext shared by all
+        modules for this frame; use it for grayscale/blob preprocessing instead
+        of recomputing from the frame.
+
+        Modules that implement forward_batch(frames, contexts) and
+        postprocess(frame, raw, timestamp, context) get run() and run_batch()
+        from this class; others must override run().
+
         Returns:
             dict: {
                 "status": str,        # e.g., "alert", "normal"
@@ -18,4 +54,53 @@ class MonitoringModule:
                 "module": str         # e.g., "guard_tracker"
             }
         """
-        raise NotImplementedError("Subclasses must implement the run() method.")
+        if not hasattr(self, "forward_batch"):
+            raise NotImplementedError("Subclasses must implement the run() method.")
+        result = self.fast_path(frame, timestamp, context)
+        if result is not None:
+            return result
+        raw = self.forward_batch([frame], [context] if context is not None else None)[0]
+        return self.postprocess(frame, raw, timestamp, context)
+
+    @metrics.timed_entry
+    def run_batch(self, frames, timestamps=None, contexts=None) -> list:
+        """
+        Processes a batch of frames and returns one result dict per frame.
+
+        Frames are processed in order, so consecutive frames from one stream
+        (e.g. an offline review job) update module state exactly as repeated
+        run() calls would. Modules with forward_batch() make a single batched
+        forward pass and postprocess each frame; others loop over run().
+        """
+        if not hasattr(self, "forward_batch"):
+            return self.run_sequential(frames, timestamps, contexts)
+        raw_outputs = self.forward_batch(frames, contexts)
+        timestamps = timestamps if timestamps is not None else [None] * len(frames)
+        contexts = contexts if contexts is not None else [None] * len(frames)
+        return [self.postprocess(frame, raw, timestamp, context)
+                for frame, raw, timestamp, context in zip(frames, raw_outputs, timestamps, contexts)]
+
+    def error_result(self, details):
+        return {
+            "status": "error",
+            "confidence": 0.0,
+            "details": details,
+            "module": self.RESULT_NAME or type(self).__name__
+        }
+
+    def fast_path(self, frame, timestamp=None, context=None):
+        """
+        Result for a frame that needs no forward pass (e.g. a face still being
+        tracked since the last detection), or None to run forward_batch() and
+        postprocess(). Runners only batch the frames this returns None for.
+        The answer depends on the previous frame's postprocess(), so modules
+        that use it must process a single stream's frames one at a time.
+        """
+        return None
+
+    def run_sequential(self, frames, timestamps=None, contexts=None):
+        """run() on each frame in turn"""
+        timestamps = timestamps if timestamps is not None else [None] * len(frames)
+        contexts = contexts if contexts is not None else [None] * len(frames)
+        return [self.run(frame, timestamp, context=context)
+                for frame, timestamp, context in zip(frames, timestamps, contexts)]
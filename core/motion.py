@@ -0,0 +1,74 @@
+# core/motion.py
+import cv2
+import numpy as np
+
+
+class MotionEngine:
+    """
+    Incremental frame-differencing motion estimator.
+
+    Each grayscale frame is reduced pyramid_level times with cv2.pyrDown and
+    blurred once; the result is kept for the next call, so every frame is
+    converted and blurred exactly once. update() returns the percentage of
+    (ROI) pixels whose blurred intensity changed by more than threshold.
+
+    roi is an optional list of polygons, each a list of (x, y) points in
+    full-resolution frame coordinates; motion outside them is ignored.
+    """
+
+    def __init__(self, pyramid_level=1, blur_ksize=21, threshold=25, roi=None):
+        self.pyramid_level = max(0, int(pyramid_level))
+        # Keep the blur footprint constant relative to the scene
+        ksize = max(3, blur_ksize >> self.pyramid_level) | 1
+        self.blur_ksize = (ksize, ksize)
+        self.threshold = threshold
+        self.roi = roi
+
+        self.prev = None
+        self._mask = None
+        self._mask_pixels = 0
+        self._diff = None
+        self._thresh = None
+
+    def reset(self):
+        self.prev = None
+
+    def prepare(self, gray):
+        small = gray
+        for _ in range(self.pyramid_level):
+            small = cv2.pyrDown(small)
+        return cv2.GaussianBlur(small, self.blur_ksize, 0)
+
+    def _roi_mask(self, full_shape, small_shape):
+        if self._mask is None or self._mask.shape != small_shape:
+            scale_x = small_shape[1] / full_shape[1]
+            scale_y = small_shape[0] / full_shape[0]
+            mask = np.zeros(small_shape, dtype=np.uint8)
+            polygons = [np.round(np.asarray(polygon, dtype=np.float32) * (scale_x, scale_y)).astype(np.int32)
+                        for polygon in self.roi]
+            cv2.fillPoly(mask, polygons, 255)
+            self._mask = mask
+            self._mask_pixels = cv2.countNonZero(mask)
+        return self._mask
+
+    def update(self, gray):
+        """Feeds the next grayscale frame; returns motion percent (0 for the first frame)."""
+        current = self.prepare(gray)
+        prev, self.prev = self.prev, current
+        if prev is None or prev.shape != current.shape:
+            return 0
+
+        if self._diff is None or self._diff.shape != current.shape:
+            self._diff = np.empty_like(current)
+            self._thresh = np.empty_like(current)
+        cv2.absdiff(prev, current, dst=self._diff)
+        cv2.threshold(self._diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self._thresh)
+
+        if self.roi:
+            mask = self._roi_mask(gray.shape[:2], current.shape[:2])
+            if not self._mask_pixels:
+                return 0
+            cv2.bitwise_and(self._thresh, mask, dst=self._thresh)
+            return cv2.countNonZero(self._thresh) / self._mask_pixels * 100
+
+        return cv2.countNonZero(self._thresh) / self._thresh.size * 100
@@ -0,0 +1,113 @@
+# core/motion_gate.py
+import threading
+
+import cv2
+
+from core import metrics
+
+
+class MotionGate:
+    """
+    Skips heavy detectors while the scene is static.
+
+    Modules opt in by setting MOTION_GATED = True. For those, the gate compares
+    a small grayscale thumbnail of the current frame with the one from the last
+    frame the module actually processed (the same frame differencing the
+    motion detectors use, at thumbnail scale). While the changed area stays
+    below motion_threshold percent, the module's last result is reused instead
+    of running inference again, for at most max_staleness seconds of frame time.
+
+    Config keys (gate-wide defaults):
+        motion_threshold: percent of thumbnail pixels that must change to rerun (default 0.5)
+        pixel_threshold:  per-pixel intensity difference counted as change (default 25)
+        max_staleness:    seconds a reused result may age before a forced rerun (default 2.0)
+        thumbnail_width:  width of the comparison thumbnail (default 160)
+
+    A module may override max_staleness and motion_threshold through its own
+    config dict.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.motion_threshold = self.config.get("motion_threshold", 0.5)
+        self.pixel_threshold = self.config.get("pixel_threshold", 25)
+        self.max_staleness = self.config.get("max_staleness", 2.0)
+        self.thumbnail_width = self.config.get("thumbnail_width", 160)
+
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def _module_setting(self, module, key, default):
+        return (getattr(module, "config", None) or {}).get(key, default)
+
+    def changed_percent(self, reference, thumbnail):
+        diff = cv2.absdiff(reference, thumbnail)
+        _, thresh = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return 100.0 * cv2.countNonZero(thresh) / thresh.size
+
+    def should_run(self, module, context):
+        """
+        Decides whether module must process this frame. Returning True marks the
+        frame as the module's new reference, so call it once per frame, in order.
+        """
+        if context is None or not getattr(module, "MOTION_GATED", False):
+            return True
+
+        thumbnail = context.thumbnail(self.thumbnail_width)
+        with self._lock:
+            state = self._state.setdefault(id(module), {"reference": None, "time": None, "result": None})
+
+        run = (
+            state["result"] is None
+            or state["reference"] is None
+            or state["reference"].shape != thumbnail.shape
+            or context.time - state["time"] > self._module_setting(module, "max_staleness", self.max_staleness)
+            or self.changed_percent(state["reference"], thumbnail)
+               > self._module_setting(module, "motion_threshold", self.motion_threshold)
+        )
+        if run:
+            state["reference"] = thumbnail
+            state["time"] = context.time
+        return run
+
+    def record(self, module, result):
+        state = self._state.get(id(module))
+        if state is not None:
+            state["result"] = dict(result)
+
+    def cached(self, module):
+        metrics.registry.count(*metrics.module_labels(module), "skipped")
+        result = dict(self._state[id(module)]["result"])
+        result["gated"] = True
+        return result
+
+    def run(self, module, frame, timestamp=None, context=None):
+        if not self.should_run(module, context):
+            return self.cached(module)
+        result = module.run(frame, timestamp, context=context)
+        self.record(module, result)
+        return result
+
+    def run_batch(self, module, frames, timestamps, contexts):
+        """run_batch() over only the frames that need processing; the rest reuse the latest result."""
+        needed = [self.should_run(module, context) for context in contexts]
+        indices = [i for i, run in enumerate(needed) if run]
+        if len(indices) == len(frames):
+            results = module.run_batch(frames, timestamps, contexts)
+            if results:
+                self.record(module, results[-1])
+            return results
+
+        fresh = module.run_batch([frames[i] for i in indices],
+                                 [timestamps[i] for i in indices],
+                                 [contexts[i] for i in indices]) if indices else []
+        fresh = dict(zip(indices, fresh))
+
+        results = []
+        for i in range(len(frames)):
+            if i in fresh:
+                results.append(fresh[i])
+                self.record(module, fresh[i])
+            else:
+                results.append(self.cached(module))
+        return results
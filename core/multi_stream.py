@@ -0,0 +1,248 @@
+# core/multi_stream.py
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+from core import metrics
+from core.frame_context import FrameContext
+from core.motion_gate import MotionGate
+from core.scheduler import DropQueue
+
+
+def parse_source(source):
+    """Device indices may be given as strings ("0"); anything else is a URL or file path."""
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+class StreamReader:
+    """Reads one camera on a background thread, keeping only its latest frame."""
+
+    def __init__(self, stream_id, source):
+        self.stream_id = stream_id
+        self.source = source
+        self.cap = cv2.VideoCapture(parse_source(source))
+        self.latest = DropQueue(1)
+        self.finished = threading.Event()
+        self._thread = threading.Thread(target=self._read_loop, name=f"stream-{stream_id}", daemon=True)
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        self._thread.start()
+
+    def _read_loop(self):
+        while not self.finished.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.latest.put((frame, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        self.finished.set()
+
+    def poll(self):
+        try:
+            return self.latest.get_nowait()
+        except queue.Empty:
+            return None
+
+    def release(self):
+        self.finished.set()
+        self._thread.join(timeout=1.0)
+        self.cap.release()
+
+
+class MultiStreamRunner:
+    """
+    Runs a set of modules over many camera streams.
+
+    Every stream gets its own module instances (detector state such as motion
+    history or alert timers is per camera), but networks are loaded through
+    core.model_cache so all instances of a module type share one model.
+
+    On each tick the latest frame of every stream is collected and, for
+    modules that implement forward_batch()/postprocess(), a single batched
+    forward pass is made for all streams; the raw outputs are then routed back
+    to each stream's own instance for postprocessing. Other modules are run
+    per stream as usual. Only instances of the same class with the same config
+    are batched together, and only for streams whose fast_path() has no result.
+
+    module_factories is either one list of factories used for every stream or
+    one such list per stream, for cameras that run different modules.
+
+        runner = MultiStreamRunner(["0", "rtsp://cam2/stream"], [AltercationDetector, AnomalyDetector])
+        for stream_id, frame, timestamp, results in runner:
+            ...
+        runner.stop()
+
+    Streams whose scene is static skip motion-gated modules entirely (see
+    core.motion_gate) and are left out of that tick's batch.
+
+    Config keys:
+        idle_sleep:  seconds to wait when no stream has a new frame (default 0.005)
+        motion_gate: MotionGate config dict, or False to run every module on every frame
+
+    detector is an optional core.detection.DetectionService; subscribed
+    modules then share one batched detection pass per tick across streams.
+    """
+
+    def __init__(self, sources, module_factories, config=None, detector=None):
+        self.config = config or {}
+        self.detector = detector
+        self.idle_sleep = self.config.get("idle_sleep", 0.005)
+        gate_config = self.config.get("motion_gate", {})
+        self.gate = MotionGate(gate_config) if gate_config is not False else None
+
+        self.streams = [StreamReader(stream_id, source) for stream_id, source in enumerate(sources)]
+        if module_factories and isinstance(module_factories[0], (list, tuple)):
+            stream_factories = module_factories
+        else:
+            stream_factories = [module_factories] * len(self.streams)
+        self.stream_modules = [[factory() for factory in factories] for factories in stream_factories]
+        for stream_id, instances in enumerate(self.stream_modules):
+            for instance in instances:
+                instance.camera = stream_id
+        self.contexts = [None] * len(self.streams)
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        for stream in self.streams:
+            if stream.is_opened():
+                stream.start()
+            else:
+                print(f"Failed to open video stream {stream.source}.")
+                stream.finished.set()
+
+    def stop(self):
+        self._running = False
+        for stream in self.streams:
+            stream.release()
+
+    def _run_group(self, instances, frames, timestamps, contexts):
+        if self.gate is None:
+            return self._run_batched(instances, frames, timestamps, contexts)
+
+        needed = [i for i, (instance, context) in enumerate(zip(instances, contexts))
+                  if self.gate.should_run(instance, context)]
+        fresh = self._run_batched([instances[i] for i in needed], [frames[i] for i in needed],
+                                  [timestamps[i] for i in needed], [contexts[i] for i in needed]) if needed else []
+        fresh = dict(zip(needed, fresh))
+
+        results = []
+        for i, instance in enumerate(instances):
+            if i in fresh:
+                self.gate.record(instance, fresh[i])
+                results.append(fresh[i])
+            else:
+                results.append(self.gate.cached(instance))
+        return results
+
+    def _run_batched(self, instances, frames, timestamps, contexts):
+        module = instances[0]
+        try:
+            if hasattr(module, "forward_batch"):
+                return self._run_forward_batch(instances, frames, timestamps, contexts)
+            return [instance.run(context.frame, timestamp, context=context)
+                    for instance, timestamp, context
+                    in zip(instances, timestamps, contexts)]
+        except Exception as e:
+            return [instance.error_result(f"Processing error: {str(e)}") for instance in instances]
+
+    def _run_forward_batch(self, instances, frames, timestamps, contexts):
+        """
+        One forward pass for the streams that need it; each instance's metrics
+        record its own stages, its share of the batch and a total, as run() would
+        """
+        totals = [0.0] * len(instances)
+        try:
+            # Streams a module can answer without its network (e.g. faces still
+            # being tracked) are left out of the batched forward pass
+            results = []
+            for i, (instance, timestamp, context) in enumerate(zip(instances, timestamps, contexts)):
+                start = time.perf_counter()
+                with metrics.attribute([instance]):
+                    results.append(instance.fast_path(context.frame, timestamp, context))
+                totals[i] += time.perf_counter() - start
+
+            pending = [i for i, result in enumerate(results) if result is None]
+            if pending:
+                start = time.perf_counter()
+                with metrics.attribute([instances[i] for i in pending]):
+                    raw_outputs = instances[pending[0]].forward_batch([frames[i] for i in pending],
+                                                                      [contexts[i] for i in pending])
+                share = (time.perf_counter() - start) / len(pending)
+                for i, raw in zip(pending, raw_outputs):
+                    start = time.perf_counter()
+                    with metrics.attribute([instances[i]]):
+                        results[i] = instances[i].postprocess(contexts[i].frame, raw, timestamps[i], contexts[i])
+                    totals[i] += share + time.perf_counter() - start
+        except Exception:
+            for instance in instances:
+                metrics.registry.count(*metrics.module_labels(instance), "errored")
+            raise
+
+        for instance, total, result in zip(instances, totals, results):
+            metrics.record_entry(instance, total, result)
+        return results
+
+    def step(self):
+        """Processes one tick: the latest frame of every stream that has a new one."""
+        ready = []
+        for stream in self.streams:
+            item = stream.poll()
+            if item is not None:
+                ready.append((stream.stream_id, item[0], item[1]))
+        if not ready:
+            return []
+
+        stream_ids = [stream_id for stream_id, _, _ in ready]
+        frames = [frame for _, frame, _ in ready]
+        timestamps = [timestamp for _, _, timestamp in ready]
+        contexts = []
+        for stream_id, frame, timestamp in ready:
+            self.contexts[stream_id] = FrameContext(frame, timestamp, prev=self.contexts[stream_id],
+                                                    detector=self.detector)
+            contexts.append(self.contexts[stream_id])
+
+        # Group instances that can share a batched forward pass: same class, same config
+        groups = {}
+        for i, stream_id in enumerate(stream_ids):
+            for k, instance in enumerate(self.stream_modules[stream_id]):
+                key = (type(instance), json.dumps(instance.config, sort_keys=True, default=str))
+                groups.setdefault(key, []).append((i, k, instance))
+
+        views = [context.frame for context in contexts]
+        per_stream_results = [[None] * len(self.stream_modules[stream_id]) for stream_id in stream_ids]
+        for members in groups.values():
+            rows = [i for i, _, _ in members]
+            results = self._run_group([instance for _, _, instance in members], [views[i] for i in rows],
+                                      [timestamps[i] for i in rows], [contexts[i] for i in rows])
+            for (i, k, _), result in zip(members, results):
+                per_stream_results[i][k] = result
+
+        # Composite each stream's module drawings onto its frame once, in place
+        for stream_id, frame, context in zip(stream_ids, frames, contexts):
+            start = time.perf_counter()
+            context.annotations.render(frame)
+            metrics.registry.observe(stream_id, "annotations", "draw", time.perf_counter() - start)
+
+        return list(zip(stream_ids, frames, timestamps, per_stream_results))
+
+    def __iter__(self):
+        self.start()
+        while self._running:
+            items = self.step()
+            if not items:
+                if all(stream.finished.is_set() and stream.latest.empty() for stream in self.streams):
+                    break
+                time.sleep(self.idle_sleep)
+                continue
+            yield from items
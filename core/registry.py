@@ -0,0 +1,92 @@
+# core/registry.py
+import importlib
+import json
+
+# Module name -> dotted path of its MonitoringModule class. Nothing is imported
+# until a module is actually used, so a camera that only runs motion-based
+# fight detection never imports torch, ultralytics or dlib.
+MODULES = {
+    "guard_tracker": "modules.guard_tracker.inference.GuardVigilanceModule",
+    "altercation_detector": "modules.altercation_detector.inference.AltercationDetector",
+    "unauthorized_access": "modules.unauthorized_access.inference.UnauthorizedAccessModule",
+    "anomaly_detector": "modules.anomaly_detector.inference.AnomalyDetector",
+    "object_interaction": "modules.object_interaction.inference.UnattendedObjectTouchModule",
+}
+
+_classes = {}
+
+
+def register(name, path):
+    """Makes a module available under name; path is "package.module.ClassName\""""
+    MODULES[name] = path
+    _classes.pop(name, None)
+
+
+def module_names():
+    return list(MODULES)
+
+
+def load_class(name):
+    """Imports (once) and returns the module class registered under name"""
+    module_class = _classes.get(name)
+    if module_class is None:
+        if name not in MODULES:
+            raise ValueError(f"Unknown module: {name} (available: {', '.join(MODULES)})")
+        module_path, class_name = MODULES[name].rsplit(".", 1)
+        module_class = getattr(importlib.import_module(module_path), class_name)
+        _classes[name] = module_class
+    return module_class
+
+
+def create(name, config=None):
+    return load_class(name)(config)
+
+
+def module_specs(modules=None):
+    """
+    Normalizes a camera's module selection to {name: config}: a list of names,
+    a dict of name -> config dict, or None for every registered module.
+    """
+    if modules is None:
+        return {name: {} for name in MODULES}
+    if isinstance(modules, dict):
+        specs = {name: dict(config or {}) for name, config in modules.items()}
+    else:
+        specs = {name: {} for name in modules}
+    for name in specs:
+        if name not in MODULES:
+            raise ValueError(f"Unknown module: {name} (available: {', '.join(MODULES)})")
+    return specs
+
+
+def load_camera_config(path):
+    """
+    Reads a per-camera JSON config:
+
+        {
+          "detector": {"provider": "onnxruntime", "threads": 2},
+          "cameras": [
+            {"source": "0", "modules": ["altercation_detector"]},
+            {"source": "rtsp://10.0.0.5/stream",
+             "modules": {"guard_tracker": {"max_faces": 4},
+                         "anomaly_detector": {"zones": {"yard": [[0, 400], [640, 400], [640, 720], [0, 720]]},
+                                              "anomaly_zones": ["yard"]}}}
+          ]
+        }
+
+    detector is the optional shared DetectionService config. A camera without
+    "modules" runs every registered module. Returns the config with each
+    camera's modules normalized to {name: config}.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    cameras = config.get("cameras", [])
+    if not cameras:
+        raise ValueError(f"{path}: no cameras configured")
+    for camera in cameras:
+        if "source" not in camera:
+            raise ValueError(f"{path}: every camera needs a source")
+        camera["source"] = str(camera["source"])
+        camera["modules"] = module_specs(camera.get("modules"))
+    config.setdefault("detector", {})
+    return config
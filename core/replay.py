@@ -0,0 +1,144 @@
+# core/replay.py
+import json
+import queue
+import threading
+
+import cv2
+
+from core.frame_context import FrameContext
+from core.motion_gate import MotionGate
+
+_STOP = object()
+
+
+def format_media_time(seconds):
+    minutes, secs = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
+
+
+class VideoReplay:
+    """
+    Headless replay of archived footage through a set of modules.
+
+    A decoder thread reads the file ahead into a bounded queue while the
+    calling thread runs the modules as fast as the CPU allows, in batches via
+    run_batch(). Every frame carries its media timestamp (FrameContext.time),
+    so duration rules measure time on the video's clock rather than the wall
+    clock, regardless of processing speed.
+
+        replay = VideoReplay("lobby_cam.mp4", modules, {"stride": 2, "log_path": "lobby.jsonl"})
+        for index, media_time, frame, results in replay:
+            ...
+
+    Config keys:
+        stride:     process every Nth frame; skipped frames are grabbed but not decoded (default 1)
+        batch_size: frames handed to each module's run_batch() at once (default 1)
+        queue_size: decoded frames buffered ahead of inference (default 16)
+        log_path:   write one JSON line of results per processed frame (default: no log)
+        motion_gate: MotionGate config dict, or False to run every module on every frame
+
+    detector is an optional core.detection.DetectionService shared by the modules.
+    """
+
+    def __init__(self, path, modules, config=None, detector=None):
+        self.config = config or {}
+        self.detector = detector
+        self.path = path
+        self.modules = list(modules)
+        self.stride = max(1, int(self.config.get("stride", 1)))
+        self.batch_size = max(1, int(self.config.get("batch_size", 1)))
+        self.log_path = self.config.get("log_path")
+        gate_config = self.config.get("motion_gate", {})
+        self.gate = MotionGate(gate_config) if gate_config is not False else None
+
+        self.frame_queue = queue.Queue(self.config.get("queue_size", 16))
+        self.fps = 0.0
+        self._stopped = threading.Event()
+        self._context = None
+
+    def _decode_loop(self, cap):
+        index = 0
+        try:
+            while not self._stopped.is_set():
+                if index % self.stride:
+                    if not cap.grab():
+                        break
+                    index += 1
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                media_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if media_time <= 0 and index > 0 and self.fps > 0:
+                    media_time = index / self.fps
+                self.frame_queue.put((index, media_time, frame))
+                index += 1
+        finally:
+            cap.release()
+            self.frame_queue.put(_STOP)
+
+    def _next_batch(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            item = self.frame_queue.get()
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _process(self, batch):
+        timestamps = [format_media_time(media_time) for _, media_time, _ in batch]
+        contexts = []
+        for (_, media_time, frame), timestamp in zip(batch, timestamps):
+            self._context = FrameContext(frame, timestamp, prev=self._context, time=media_time,
+                                         detector=self.detector)
+            contexts.append(self._context)
+
+        # Headless: modules share read-only views and their annotations are never rendered
+        views = [context.frame for context in contexts]
+        per_module = []
+        for module in self.modules:
+            if self.gate is not None:
+                per_module.append(self.gate.run_batch(module, views, timestamps, contexts))
+            else:
+                per_module.append(module.run_batch(views, timestamps, contexts))
+        return [list(results) for results in zip(*per_module)] if per_module else [[] for _ in batch]
+
+    def stop(self):
+        self._stopped.set()
+
+    def __iter__(self):
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            raise IOError(f"Could not open video file: {self.path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+        decoder = threading.Thread(target=self._decode_loop, args=(cap,), name="replay-decoder", daemon=True)
+        decoder.start()
+
+        log = open(self.log_path, "w", encoding="utf-8") if self.log_path else None
+        try:
+            done = False
+            while not done and not self._stopped.is_set():
+                batch, done = self._next_batch()
+                if not batch:
+                    break
+                for (index, media_time, frame), results in zip(batch, self._process(batch)):
+                    if log is not None:
+                        record = {"frame": index, "media_time": round(media_time, 3),
+                                  "results": results}
+                        # default=float converts numpy scalar confidences
+                        log.write(json.dumps(record, default=float) + "\n")
+                    yield index, media_time, frame, results
+        finally:
+            self.stop()
+            # Unblock the decoder if it is waiting on a full queue
+            while decoder.is_alive():
+                try:
+                    self.frame_queue.get_nowait()
+                except queue.Empty:
+                    decoder.join(timeout=0.1)
+            if log is not None:
+                log.close()
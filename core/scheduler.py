@@ -0,0 +1,165 @@
+# core/scheduler.py
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from core import metrics
+from core.frame_context import FrameContext
+from core.motion_gate import MotionGate
+
+_STOP = object()
+
+
+class DropQueue(queue.Queue):
+    """
+    Bounded queue between pipeline stages.
+
+    With drop_oldest=True a put() on a full queue discards the oldest item
+    instead of blocking, so a slow consumer always sees the most recent frames
+    and end-to-end latency stays bounded.
+    """
+
+    def __init__(self, maxsize=2, drop_oldest=True):
+        super().__init__(maxsize)
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+
+    def put(self, item, block=True, timeout=None):
+        if not self.drop_oldest:
+            return super().put(item, block, timeout)
+        with self.mutex:
+            while 0 < self.maxsize <= self._qsize():
+                self._get()
+                self.dropped += 1
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+
+class FrameScheduler:
+    """
+    Pipelined capture -> inference -> render scheduler.
+
+    A capture thread reads frames from a cv2.VideoCapture-like source, an
+    inference thread runs every module on each frame concurrently on a thread
+    pool (OpenCV DNN and torch release the GIL), and the caller iterates over
+    the scheduler on its own thread to render and raise alerts:
+
+        scheduler = FrameScheduler(cap, modules)
+        for frame, timestamp, results in scheduler:
+            ...
+        scheduler.stop()
+
+    Config keys:
+        queue_size:  capacity of each inter-stage queue (default 2)
+        drop_policy: "oldest" to drop stale frames when a stage falls behind,
+                     "block" to apply back-pressure instead (default "oldest")
+        workers:     inference thread pool size (default: one per module)
+        motion_gate: MotionGate config dict, or False to run every module on every frame
+        camera:      label for this stream's metrics (default 0)
+
+    detector is an optional core.detection.DetectionService shared by the
+    modules through FrameContext.detections.
+    """
+
+    def __init__(self, source, modules, config=None, detector=None):
+        self.config = config or {}
+        self.source = source
+        self.modules = list(modules)
+        self.detector = detector
+        self.camera = self.config.get("camera", 0)
+        for module in self.modules:
+            module.camera = self.camera
+
+        queue_size = self.config.get("queue_size", 2)
+        drop_oldest = self.config.get("drop_policy", "oldest") == "oldest"
+        self.frame_queue = DropQueue(queue_size, drop_oldest)
+        self.result_queue = DropQueue(queue_size, drop_oldest)
+
+        workers = self.config.get("workers", max(1, len(self.modules)))
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+
+        gate_config = self.config.get("motion_gate", {})
+        self.gate = MotionGate(gate_config) if gate_config is not False else None
+
+        self._running = threading.Event()
+        self._threads = []
+
+    def get_timestamp(self):
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def start(self):
+        if self._running.is_set():
+            return
+        self._running.set()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference-dispatch", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._running.clear()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self.pool.shutdown(wait=False)
+
+    @property
+    def dropped_frames(self):
+        return self.frame_queue.dropped + self.result_queue.dropped
+
+    def _capture_loop(self):
+        while self._running.is_set():
+            ret, frame = self.source.read()
+            if not ret:
+                break
+            dropped = self.frame_queue.dropped
+            self.frame_queue.put((frame, self.get_timestamp()))
+            if self.frame_queue.dropped != dropped:
+                metrics.registry.count(self.camera, "FrameScheduler", "dropped", self.frame_queue.dropped - dropped)
+        self.frame_queue.put(_STOP)
+
+    def _run_module(self, module, timestamp, context):
+        # Modules share the context's read-only view of the frame and draw into its annotation layer
+        try:
+            if self.gate is not None:
+                if not self.gate.should_run(module, context):
+                    return self.gate.cached(module)
+                result = module.run(context.frame, timestamp, context=context)
+                self.gate.record(module, result)
+                return result
+            return module.run(context.frame, timestamp, context=context)
+        except Exception as e:
+            return module.error_result(f"Processing error: {e}")
+
+    def _inference_loop(self):
+        context = None
+        while self._running.is_set():
+            item = self.frame_queue.get()
+            if item is _STOP:
+                break
+            frame, timestamp = item
+            context = FrameContext(frame, timestamp, prev=context, detector=self.detector)
+
+            # Modules of one frame run in parallel; the next frame waits for all of
+            # them so stateful modules always see their frames in order.
+            futures = [self.pool.submit(self._run_module, module, timestamp, context)
+                       for module in self.modules]
+            results = [future.result() for future in futures]
+            # Every module is done with the frame: composite their drawings once, in place
+            start = time.perf_counter()
+            context.annotations.render(frame)
+            metrics.registry.observe(self.camera, "annotations", "draw", time.perf_counter() - start)
+            self.result_queue.put((frame, timestamp, results))
+        self.result_queue.put(_STOP)
+
+    def __iter__(self):
+        self.start()
+        while self._running.is_set():
+            item = self.result_queue.get()
+            if item is _STOP:
+                break
+            yield item
@@ -0,0 +1,115 @@
+# core/zones.py
+import cv2
+import numpy as np
+
+
+def rectangle(x1, y1, x2, y2):
+    """Polygon for an axis-aligned rectangle"""
+    return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+
+
+class ZoneMap:
+    """
+    Named polygon zones for one camera.
+
+    zones maps a name to a polygon, a list of (x, y) points in full-resolution
+    frame coordinates:
+
+        ZoneMap({"gate": [(0, 300), (200, 300), (200, 720), (0, 720)],
+                 "fence": rectangle(900, 0, 1280, 400)})
+
+    On the first frame (and whenever the frame size changes) every zone is
+    rasterized once into a mask and an integral image at scale times the frame
+    resolution. After that, a point-in-zone test is a single mask lookup and
+    the fraction of a box inside a zone is four integral-image lookups, both
+    vectorized over all detections and zones, so the per-frame cost does not
+    depend on polygon complexity.
+
+    Queries return (Z, N) arrays with one row per requested zone, in the
+    order given (default: all zones, in definition order).
+    """
+
+    def __init__(self, zones, scale=0.25):
+        self.names = list(zones)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.polygons = [np.asarray(zones[name], dtype=np.float32).reshape(-1, 2) for name in self.names]
+        self.scale = scale
+
+        self._frame_shape = None
+        self._grid_scale = None  # (x, y) frame -> grid factors
+        self._masks = None      # (Z, h, w) uint8, 1 inside the zone
+        self._integrals = None  # (Z, h + 1, w + 1) int32 running sums of the masks
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def prepare(self, frame_shape):
+        """Rasterizes every zone for frames of frame_shape; a no-op while the size is unchanged"""
+        h, w = frame_shape[:2]
+        if self._frame_shape == (h, w):
+            return
+        grid_h, grid_w = max(1, round(h * self.scale)), max(1, round(w * self.scale))
+        scale = np.array([grid_w / w, grid_h / h], dtype=np.float32)
+
+        self._masks = np.zeros((len(self.names), grid_h, grid_w), dtype=np.uint8)
+        self._integrals = np.empty((len(self.names), grid_h + 1, grid_w + 1), dtype=np.int32)
+        for mask, integral, polygon in zip(self._masks, self._integrals, self.polygons):
+            cv2.fillPoly(mask, [np.round(polygon * scale).astype(np.int32)], 1)
+            integral[:] = cv2.integral(mask)
+        self._frame_shape = (h, w)
+        self._grid_scale = scale
+
+    def _rows(self, names):
+        if names is None:
+            return np.arange(len(self.names))
+        return np.array([self.index[name] for name in names], dtype=int)
+
+    def _to_grid(self, values, axis, size):
+        return np.clip(np.floor(values * self._grid_scale[axis]), 0, size - 1).astype(int)
+
+    def contains_points(self, points, frame_shape, names=None):
+        """(Z, N) bool: which of the (N, 2) points lie inside each zone; NaN or off-frame points never do"""
+        self.prepare(frame_shape)
+        rows = self._rows(names)
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        h, w = self._frame_shape
+        valid = np.isfinite(points).all(axis=1)
+        valid &= (points[:, 0] >= 0) & (points[:, 0] <= w) & (points[:, 1] >= 0) & (points[:, 1] <= h)
+
+        grid_h, grid_w = self._masks.shape[1:]
+        xs = self._to_grid(np.nan_to_num(points[:, 0]), 0, grid_w)
+        ys = self._to_grid(np.nan_to_num(points[:, 1]), 1, grid_h)
+        inside = self._masks[rows[:, None], ys[None, :], xs[None, :]].astype(bool)
+        return inside & valid[None, :]
+
+    def coverage(self, boxes, frame_shape, names=None):
+        """(Z, N) float: fraction of each (N, 4) x1, y1, x2, y2 box that lies inside each zone"""
+        self.prepare(frame_shape)
+        rows = self._rows(names)[:, None]
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+        grid_h, grid_w = self._masks.shape[1:]
+        x1 = self._to_grid(boxes[:, 0], 0, grid_w + 1)
+        x2 = self._to_grid(boxes[:, 2], 0, grid_w + 1)
+        y1 = self._to_grid(boxes[:, 1], 1, grid_h + 1)
+        y2 = self._to_grid(boxes[:, 3], 1, grid_h + 1)
+        integrals = self._integrals
+        inside = (integrals[rows, y2, x2] - integrals[rows, y1, x2]
+                  - integrals[rows, y2, x1] + integrals[rows, y1, x1])
+        area = np.maximum((x2 - x1) * (y2 - y1), 1)
+        return inside / area[None, :]
+
+    def bounds(self, name):
+        """Axis-aligned bounding box x1, y1, x2, y2 of a zone's polygon"""
+        polygon = self.polygons[self.index[name]]
+        (x1, y1), (x2, y2) = polygon.min(axis=0), polygon.max(axis=0)
+        return float(x1), float(y1), float(x2), float(y2)
+
+
+def foot_points(boxes):
+    """(N, 2) bottom-center points of (N, 4) boxes, where a person stands"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2.0, boxes[:, 3]], axis=1)
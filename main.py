@@ -1,48 +1,84 @@
 # main.py
 
+import argparse
+import functools
+import os
 import cv2
-import platform
+import time
 from datetime import datetime
 
-from modules.guard_tracker.inference import GuardVigilanceModule
-from modules.altercation_detector.inference import AltercationDetector
-from modules.unauthorized_access.inference import UnauthorizedAccessModule
-from modules.anomaly_detector.inference import AnomalyDetector
-from modules.object_interaction.inference import UnattendedObjectTouchModule
-
-if platform.system() == "Windows":
-    import winsound
-
-modules = [
-    GuardVigilanceModule(),
-    AltercationDetector(),
-    UnauthorizedAccessModule(),
-    AnomalyDetector(),
-    UnattendedObjectTouchModule()
-]
-
-ALERT_DURATION = 5  # seconds
-alert_timers = {}
+from core import metrics, registry
+from core.alerts import AlertDispatcher, ConsoleSink, LogSink, SoundSink, WebhookSink
+from core.detection import DetectionService
+from core.event_log import EventLog
+from core.multi_stream import MultiStreamRunner, parse_source
+from core.replay import VideoReplay
+from core.scheduler import FrameScheduler
+
+# Modules are looked up by name in core.registry and imported only when a camera
+# selects them (--config / --module); cameras without a selection run all of these
+DEFAULT_MODULES = registry.module_names()
+
+# One detector pass per frame for every module that declares DETECTION_CLASSES,
+# instead of each running its own person/object model
+SHARED_DETECTOR = True
+
+SCHEDULER_CONFIG = {
+    "queue_size": 2,
+    "drop_policy": "oldest",  # or "block" to process every frame
+}
+
+ALERT_CONFIG = {
+    "alert_duration": 5,  # seconds a status must persist before alerting
+    "rate_limit": 5,      # alerts per second passed on to the sinks
+}
+ALERT_LOG = None            # e.g. "alerts.jsonl"
+ALERT_WEBHOOK = None        # e.g. "http://127.0.0.1:8080/alerts"
+
+# Per-camera, per-module stage timings and frame counters: text endpoint on
+# http://127.0.0.1:METRICS_PORT/metrics (None or --metrics-port 0 to disable) and a log summary every interval
+METRICS_PORT = 9100
+METRICS_LOG_INTERVAL = 60  # seconds
+
+# Every module result is appended here for auditing (query with core.event_log.query); None to disable.
+# It sits next to this file rather than in the working directory, and is git-ignored
+EVENT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "event_logs")
+
+def make_module(name, detector=None, config=None):
+    module_class = registry.load_class(name)
+    shared = detector is not None and getattr(module_class, "DETECTION_CLASSES", None)
+    config = dict(config or {})
+    if shared:
+        config["shared_detector"] = True
+    module = module_class(config or None)
+    if shared:
+        detector.subscribe(module)
+    return module
+
+def build_modules(specs, detector=None):
+    return [make_module(name, detector, config) for name, config in specs.items()]
+
+def make_detector(cameras, config=None):
+    # Only worth loading if some selected module would subscribe to it
+    subscribers = any(getattr(registry.load_class(name), "DETECTION_CLASSES", None)
+                      for camera in cameras for name in camera["modules"])
+    return DetectionService(config) if SHARED_DETECTOR and subscribers else None
 
 def get_timestamp():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-def check_and_trigger_alert(result, timestamp):
-    status = result["status"]
-    module_name = result["module"]
-
-    if status in ["distracted", "sleeping", "absent", "touching", "alert"]:
-        if module_name not in alert_timers:
-            alert_timers[module_name] = {"start": datetime.now(), "alerted": False}
-        else:
-            elapsed = (datetime.now() - alert_timers[module_name]["start"]).total_seconds()
-            if elapsed > ALERT_DURATION and not alert_timers[module_name]["alerted"]:
-                print(f"[{timestamp}] ⚠️ ALERT: {module_name.upper()} - {result['details']}")
-                if platform.system() == "Windows":
-                    winsound.Beep(1000, 400)
-                alert_timers[module_name]["alerted"] = True
-    else:
-        alert_timers[module_name] = {"start": datetime.now(), "alerted": False}
+def make_dispatcher(live=True):
+    # Sinks run on the dispatcher's worker thread, never in the frame loop
+    sinks = [ConsoleSink()]
+    if live:
+        sinks.append(SoundSink())
+    if ALERT_LOG:
+        sinks.append(LogSink(ALERT_LOG))
+    if ALERT_WEBHOOK:
+        sinks.append(WebhookSink(ALERT_WEBHOOK))
+    # Replays run faster than realtime, so a wall-clock rate limit would drop their alerts
+    config = ALERT_CONFIG if live else {**ALERT_CONFIG, "rate_limit": None}
+    return AlertDispatcher(sinks, config).start()
 
 def draw_status_overlay(frame, result, idx):
     text = f"{result['module'].upper()}: {result['status'].upper()} - {result['details']} (Conf: {result['confidence']:.2f})"
@@ -50,31 +86,134 @@ def draw_status_overlay(frame, result, idx):
     color = (0, 255, 0) if result["status"] in ["attentive", "no_touch"] else (0, 0, 255)
     cv2.putText(frame, text, (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 
-def main():
-    cap = cv2.VideoCapture(0)
+def make_event_log():
+    return EventLog(EVENT_LOG_DIR) if EVENT_LOG_DIR else None
+
+def run_single_stream(camera, detector_config=None):
+    cap = cv2.VideoCapture(parse_source(camera["source"]))
 
     if not cap.isOpened():
         print("Failed to open video stream.")
         return
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
+    detector = make_detector([camera], detector_config)
+    modules = build_modules(camera["modules"], detector)
+    scheduler = FrameScheduler(cap, modules, SCHEDULER_CONFIG, detector=detector)
+    alerts = make_dispatcher()
+    events = make_event_log()
+
+    # Capture and inference run on background threads; rendering and alerting stay here
+    for frame, timestamp, results in scheduler:
+        if events is not None:
+            events.extend(results, timestamp)
+        for idx, result in enumerate(results):
+            alerts.submit(result, timestamp)
+            draw_status_overlay(frame, result, idx)
+
+        cv2.imshow("Security Monitoring", frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
-        timestamp = get_timestamp()
+    scheduler.stop()
+    alerts.stop()
+    if events is not None:
+        events.close()
+    cap.release()
+    cv2.destroyAllWindows()
 
-        for idx, module in enumerate(modules):
-            result = module.run(frame.copy(), timestamp)
-            check_and_trigger_alert(result, timestamp)
+def run_multi_stream(cameras, detector_config=None):
+    # One module instance per camera, one loaded model per module type
+    detector = make_detector(cameras, detector_config)
+    sources = [camera["source"] for camera in cameras]
+    factories = [[functools.partial(make_module, name, detector, config) for name, config in camera["modules"].items()]
+                 for camera in cameras]
+    runner = MultiStreamRunner(sources, factories, detector=detector)
+    alerts = make_dispatcher()
+    events = make_event_log()
+
+    for stream_id, frame, timestamp, results in runner:
+        if events is not None:
+            events.extend(results, timestamp, camera=stream_id)
+        for idx, result in enumerate(results):
+            alerts.submit(result, timestamp, camera=stream_id)
             draw_status_overlay(frame, result, idx)
 
-        cv2.imshow("Security Monitoring", frame)
+        cv2.imshow(f"Security Monitoring [{sources[stream_id]}]", frame)
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
-    cap.release()
+    runner.stop()
+    alerts.stop()
+    if events is not None:
+        events.close()
     cv2.destroyAllWindows()
 
+def run_replay(path, camera, stride, batch_size, log_path, detector_config=None):
+    detector = make_detector([camera], detector_config)
+    modules = build_modules(camera["modules"], detector)
+    replay = VideoReplay(path, modules, {"stride": stride, "batch_size": batch_size, "log_path": log_path},
+                         detector=detector)
+    alerts = make_dispatcher(live=False)
+    events = make_event_log()
+
+    # Headless: alerts are evaluated on media time, not on how fast we get through the file
+    start = time.time()
+    frames = 0
+    for _, media_time, _, results in replay:
+        frames += 1
+        label = f"{path} @ {media_time:.1f}s"
+        if events is not None:
+            events.extend(results, label, camera=path, now=media_time)
+        for result in results:
+            alerts.submit(result, label, camera=path, now=media_time)
+    alerts.stop()
+    if events is not None:
+        events.close()
+
+    elapsed = time.time() - start
+    print(f"Processed {frames} frames in {elapsed:.1f}s ({frames / elapsed if elapsed else 0:.1f} fps)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run monitoring modules on one or more video sources.")
+    parser.add_argument("--source", action="append",
+                        help="Device index, RTSP URL or video file; repeat for multiple cameras (default: 0)")
+    parser.add_argument("--config", metavar="FILE",
+                        help="Per-camera JSON config of sources and modules (see core.registry.load_camera_config)")
+    parser.add_argument("--module", action="append", choices=registry.module_names(),
+                        help="Module to run on every --source; repeat for several (default: all)")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="Process an archived video file headless, as fast as possible")
+    parser.add_argument("--stride", type=int, default=1, help="Replay: process every Nth frame (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Replay: frames per run_batch() call (default: 1)")
+    parser.add_argument("--log", metavar="FILE", help="Replay: write per-frame results as JSON lines")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help=f"Port of the metrics endpoint, 0 to disable (default: {METRICS_PORT})")
+    args = parser.parse_args()
+
+    if args.config:
+        config = registry.load_camera_config(args.config)
+        cameras, detector_config = config["cameras"], config["detector"]
+    else:
+        specs = registry.module_specs(args.module or DEFAULT_MODULES)
+        cameras = [{"source": source, "modules": specs} for source in args.source or ["0"]]
+        detector_config = None
+
+    if args.metrics_port:
+        try:
+            metrics.serve(args.metrics_port)
+        except OSError as e:
+            # e.g. a replay job next to a live camera on the same box
+            print(f"Metrics endpoint disabled: cannot bind port {args.metrics_port} ({e})")
+    if METRICS_LOG_INTERVAL:
+        metrics.log_periodically(METRICS_LOG_INTERVAL)
+
+    if args.replay:
+        # Archived footage runs the first camera's module selection
+        run_replay(args.replay, cameras[0], args.stride, args.batch_size, args.log, detector_config)
+    elif len(cameras) == 1:
+        run_single_stream(cameras[0], detector_config)
+    else:
+        run_multi_stream(cameras, detector_config)
+
 if __name__ == "__main__":
     main()
@@ -4,8 +4,15 @@ import numpy as np
 import time
 from collections import deque
 
-class AltercationDetector:
+from core.annotation import annotation_layer
+from core.module_interface import MonitoringModule
+from core.motion import MotionEngine
+
+class AltercationDetector(MonitoringModule):
+    RESULT_NAME = "altercation_detector"
+
     def __init__(self, config=None):
+        super().__init__(config)
         # Parameters
         self.REQUIRED_DURATION = 5    # Must detect fighting for 5+ seconds
         self.COOLDOWN_DURATION = 10   # Seconds before next alert can trigger
@@ -13,14 +20,19 @@ class AltercationDetector:
         self.SMOOTHING_WINDOW = 15    # Number of frames for motion smoothing
 
         self.motion_history = deque(maxlen=self.SMOOTHING_WINDOW)
-        self.prev_frame = None
+        # pyramid_level: each level halves the resolution motion is computed at
+        # roi: optional list of polygons [(x, y), ...] to restrict motion to
+        self.motion = MotionEngine(
+            pyramid_level=self.config.get("pyramid_level", 1),
+            roi=self.config.get("roi")
+        )
         self.fighting_start_time = 0
         self.is_currently_fighting = False
-        self.last_alert_time = 0
+        self.last_alert_time = float("-inf")
 
     def select_input_source(self):
         """ Select input source (webcam or video file) """
-        return "webcam"  # Default to webcam (could be extended to support video files)
+        return self.config.get("source", "webcam")  # Device index or video file path
 
     def detect_motion(self, prev_frame, current_frame, threshold=25):
         """Detects motion between two frames using simple frame differencing"""
@@ -34,17 +46,16 @@ class AltercationDetector:
         
         frame_diff = cv2.absdiff(gray1, gray2)
         _, thresh = cv2.threshold(frame_diff, threshold, 255, cv2.THRESH_BINARY)
-        
-        motion_pixels = np.sum(thresh) / 255
-        total_pixels = thresh.size
-        return (motion_pixels / total_pixels) * 100
 
-    def run(self, frame: np.ndarray, timestamp: str = None) -> dict:
+        return cv2.countNonZero(thresh) / thresh.size * 100
+
+    def run(self, frame: np.ndarray, timestamp: str = None, context=None) -> dict:
         """Runs the fighting detection logic"""
-        current_time = time.time()
+        # Media time when replaying footage, so durations are measured on the video's clock
+        current_time = context.time if context is not None else time.time()
 
-        motion_level = self.detect_motion(self.prev_frame, frame) if self.prev_frame is not None else 0
-        self.prev_frame = frame.copy()
+        gray = context.gray if context is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        motion_level = self.motion.update(gray)
         self.motion_history.append(motion_level)
 
         smoothed_motion = sum(self.motion_history) / len(self.motion_history) if self.motion_history else 0
@@ -75,7 +86,7 @@ class AltercationDetector:
         
         # Add text to frame (showing status and confidence)
         label = f"Violence: {status_text} | Confidence: {confidence:.2f}%"
-        cv2.putText(frame, label, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, text_color, 2, cv2.LINE_AA)
+        annotation_layer(frame, context).text(label, (50, 50), 0.8, text_color, 2, line_type=cv2.LINE_AA)
 
         return {
             "status": status,
@@ -1,21 +1,45 @@
 # modules/anomaly_detector/inference.py
-import cv2
 import numpy as np
 import time
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 import os
 
-class AnomalyDetector:
+from core.module_interface import MonitoringModule
+from core.batching import batch_blob, split_ssd_detections
+from core.zones import foot_points
+from core.detection import Detections, shared_detections
+from core.annotation import annotation_layer
+from core.backends import load_network, release_network
+
+class AnomalyDetector(MonitoringModule):
+    RESULT_NAME = "anomaly_detector"
+    MOTION_GATED = True
+    DETECTION_CLASSES = {"person"}
+
     def __init__(self, config=None):
+        super().__init__(config)
         self.MIN_CONFIDENCE = 0.5
-        self.ACTIVE_START_HOUR = 22  # 4 PM
-        self.ACTIVE_END_HOUR = 9   # 5 AM
+        # active_hours: [start, end) in local wall-clock hours, wrapping past midnight
+        self.ACTIVE_START_HOUR, self.ACTIVE_END_HOUR = self.config.get("active_hours", (22, 9))
 
-        model_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
-        self.net = cv2.dnn.readNetFromCaffe(
-            os.path.join(model_dir, "deploy.prototxt"),
-            os.path.join(model_dir, "mobilenet_iter_73000.caffemodel")
-        )
+        # The network is only resident during active hours: every instance releases its
+        # reference when the window closes, and it is reloaded and warmed on a background
+        # thread preload_minutes before it opens. The schedule is evaluated only at the
+        # next cached transition, by every instance through fast_path().
+        # With shared_detector the MobileNet-SSD is only loaded if a frame arrives without
+        # shared detections.
+        self.preload_seconds = self.config.get("preload_minutes", 5) * 60
+        self.net = None
+        self._net_lock = threading.Lock()
+        self._preload_thread = None
+        self._active = False
+        self._next_check = 0.0
+        self.update_schedule()
+
+        # anomaly_zones: names from the "zones" config; when set, only persons standing
+        # inside one of them count, so e.g. a public walkway in view can be ignored
+        self.anomaly_zones = list(self.config.get("anomaly_zones", []))
 
         self.class_labels = [
             "background", "aeroplane", "bicycle", "bird", "boat",
@@ -24,53 +48,140 @@ class AnomalyDetector:
             "pottedplant", "sheep", "sofa", "train", "tvmonitor"
         ]
 
-    def is_active_time(self):
-        current_hour = datetime.now().hour
+    def load_net(self):
+        # backend: optional core.backends spec overriding the default OpenCV/Caffe one,
+        # e.g. {"provider": "onnxruntime", "model": "models/mobilenet_ssd.onnx", "threads": 2, "int8": True}
+        model_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+        spec = {
+            "provider": "opencv",
+            "model": os.path.join(model_dir, "mobilenet_iter_73000.caffemodel"),
+            "config": os.path.join(model_dir, "deploy.prototxt"),
+        }
+        spec.update(self.config.get("backend", {}))
+        self._spec = spec
+        return load_network(spec)
+
+    def in_active_hours(self, hour):
         if self.ACTIVE_START_HOUR < self.ACTIVE_END_HOUR:
-            return self.ACTIVE_START_HOUR <= current_hour < self.ACTIVE_END_HOUR
+            return self.ACTIVE_START_HOUR <= hour < self.ACTIVE_END_HOUR
         else:
-            return current_hour >= self.ACTIVE_START_HOUR or current_hour < self.ACTIVE_END_HOUR
+            return hour >= self.ACTIVE_START_HOUR or hour < self.ACTIVE_END_HOUR
 
-    def run(self, frame, timestamp=None):
-        (h, w) = frame.shape[:2]
+    def next_transition(self, now):
+        """Epoch seconds of the next hour boundary where the active state flips, or inf if it never does"""
+        hour_start = datetime.fromtimestamp(now).replace(minute=0, second=0, microsecond=0)
+        active = self.in_active_hours(hour_start.hour)
+        for hours in range(1, 25):
+            boundary = hour_start + timedelta(hours=hours)
+            if self.in_active_hours(boundary.hour) != active:
+                return boundary.timestamp()
+        return float("inf")
+
+    def ensure_net(self):
+        with self._net_lock:
+            if self.net is None:
+                self.net = self.load_net()
+            return self.net
+
+    def warm_up(self):
+        """Loads the network and runs one dummy pass so the first active frame is not slowed down"""
+        # The shared network serializes forward(), so this never overlaps another camera's inference
+        self.ensure_net().forward(np.zeros((1, 3, 300, 300), dtype=np.float32))
+
+    def release_net(self):
+        with self._net_lock:
+            if self.net is not None:
+                self.net = None
+                release_network(self._spec)
+
+    def update_schedule(self, now=None):
+        """
+        Applies the active-hours schedule and returns whether the module is
+        active. Between transitions this is a single float comparison.
+        """
+        now = time.time() if now is None else now
+        if now < self._next_check:
+            return self._active
+
+        self._active = self.in_active_hours(datetime.fromtimestamp(now).hour)
+        transition = self.next_transition(now)
+        if self._active:
+            if self._preload_thread is not None:
+                self._preload_thread.join()
+                self._preload_thread = None
+            if not self.config.get("shared_detector"):
+                self.ensure_net()
+            self._next_check = transition
+        else:
+            self.release_net()
+            preload_at = transition - self.preload_seconds
+            if now >= preload_at:
+                if not self.config.get("shared_detector"):
+                    self._preload_thread = threading.Thread(target=self.warm_up, name="anomaly-preload", daemon=True)
+                    self._preload_thread.start()
+                self._next_check = transition
+            else:
+                self._next_check = preload_at
+        return self._active
+
+    def is_active_time(self):
+        return self.update_schedule()
+
+    def inactive_result(self):
+        return {
+            "status": "inactive",
+            "confidence": 0.0,
+            "details": "System outside active hours",
+            "module": "anomaly_detector"
+        }
+
+    def fast_path(self, frame, timestamp=None, context=None):
+        """Outside active hours no forward pass is needed; runners call this for every instance"""
+        return None if self.is_active_time() else self.inactive_result()
+
+    def forward_batch(self, frames, contexts=None):
+        """
+        Person detections for a batch of frames, from the shared detector when
+        available, else one MobileNet-SSD pass; None per frame outside active hours
+        """
         if not self.is_active_time():
-            return {
-                "status": "inactive",
-                "confidence": 0.0,
-                "details": "System outside active hours",
-                "module": "anomaly_detector"
-            }
+            return [None] * len(frames)
+
+        shared = shared_detections(contexts)
+        if shared is not None:
+            return [detections.select({"person"}, self.MIN_CONFIDENCE) for detections in shared]
 
-        blob = cv2.dnn.blobFromImage(frame, 0.007843, (300, 300), 127.5)
-        self.net.setInput(blob)
-        detections = self.net.forward()
+        net = self.ensure_net()
+        blob = batch_blob(frames, contexts, 0.007843, (300, 300), 127.5)
+        names = dict(enumerate(self.class_labels))
+        return [Detections.from_ssd(detections, frame.shape[1], frame.shape[0], names)
+                .select({"person"}, self.MIN_CONFIDENCE)
+                for frame, detections in zip(frames, split_ssd_detections(net.forward(blob), len(frames)))]
 
-        anomaly_detected = False
-        person_count = 0
+    def postprocess(self, frame, detections, timestamp=None, context=None):
+        if detections is None:
+            return self.inactive_result()
 
-        for i in range(detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
-            if confidence > self.MIN_CONFIDENCE:
-                class_id = int(detections[0, 0, i, 1])
-                label = self.class_labels[class_id]
+        if self.anomaly_zones and self.zones is not None:
+            inside = self.zones.contains_points(foot_points(detections.boxes), frame.shape, self.anomaly_zones)
+            detections = detections.subset(inside.any(axis=0))
 
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                (startX, startY, endX, endY) = box.astype("int")
+        person_count = len(detections)
+        anomaly_detected = person_count > 0
 
-                if class_id == 15:  # person
-                    anomaly_detected = True
-                    person_count += 1
-                    # Draw bounding box on person only
-                    color = (0, 0, 255)
-                    cv2.rectangle(frame, (startX, startY), (endX, endY), color, 2)
-                    cv2.putText(frame, f"Person: {confidence:.2f}", (startX, startY - 5),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        # Draw bounding box on persons only
+        canvas = annotation_layer(frame, context)
+        color = (0, 0, 255)
+        for (startX, startY, endX, endY), confidence in zip(detections.boxes.astype(int), detections.scores):
+            canvas.rectangle((int(startX), int(startY)), (int(endX), int(endY)), color, 2)
+            canvas.text(f"Person: {confidence:.2f}", (int(startX), int(startY) - 5), 0.5, color, 2)
 
         if anomaly_detected:
             return {
                 "status": "anomaly",
                 "confidence": 1.0,
-                "details": f"{person_count} person(s) detected during restricted hours",
+                "details": f"{person_count} person(s) detected during restricted hours"
+                           + (f" in {', '.join(self.anomaly_zones)}" if self.anomaly_zones else ""),
                 "module": "anomaly_detector"
             }
 
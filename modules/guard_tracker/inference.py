@@ -1,116 +1,260 @@
 # modules/guard_vigilance/inference.py
 from core.module_interface import MonitoringModule
+from core.batching import batch_blob, split_ssd_detections
+from core.backends import load_network
+from core.model_cache import shared_model
 import numpy as np
 import cv2
 import dlib
 import os
-from scipy.spatial import distance as dist
+
+# 3D reference points for head pose: nose tip, chin, left/right eye corner, left/right mouth corner
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),               # Nose tip
+    (0.0, -63.6, -12.5),           # Chin
+    (-43.3, 32.7, -26.0),          # Left eye
+    (43.3, 32.7, -26.0),           # Right eye
+    (-28.9, -28.9, -24.1),         # Left mouth
+    (28.9, -28.9, -24.1),          # Right mouth
+])
+POSE_LANDMARKS = [30, 8, 36, 45, 48, 54]
+
+# Most severe first: the frame-level status is that of the worst-off guard
+STATUS_PRIORITY = ["sleeping", "distracted", "unknown", "attentive"]
+
+def shape_to_np(shape):
+    """All 68 dlib landmarks as a (68, 2) float array"""
+    return np.array([(p.x, p.y) for p in shape.parts()], dtype=np.float64)
+
+def box_iou(boxes_a, boxes_b):
+    """Pairwise IoU of two (N, 4) and (M, 4) x1, y1, x2, y2 box arrays"""
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+class FaceTrack:
+    """Per-guard state that persists across frames under a stable ID"""
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.tracker = None
+        # Last head pose, used to warm-start solvePnP on the next frame
+        self.rotation_vec = None
+        self.translation_vec = None
 
 class GuardVigilanceModule(MonitoringModule):
+    RESULT_NAME = "guard_vigilance"
+
     def __init__(self, config=None):
         super().__init__(config)
         base = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../models'))
-        
-        self.face_net = cv2.dnn.readNetFromCaffe(
-            os.path.join(base, "deploy1.prototxt"),
-            os.path.join(base, "res10_300x300_ssd_iter_140000.caffemodel")
-        )
 
-        self.predictor = dlib.shape_predictor(os.path.join(base, "shape_predictor_68_face_landmarks.dat"))
+        # backend: optional core.backends spec overriding the default OpenCV/Caffe face SSD
+        face_spec = {
+            "provider": "opencv",
+            "model": os.path.join(base, "res10_300x300_ssd_iter_140000.caffemodel"),
+            "config": os.path.join(base, "deploy1.prototxt"),
+        }
+        face_spec.update(self.config.get("backend", {}))
+        self.face_net = load_network(face_spec)
+
+        predictor_path = os.path.join(base, "shape_predictor_68_face_landmarks.dat")
+        self.predictor = shared_model(("dlib", predictor_path), lambda: dlib.shape_predictor(predictor_path))
         self.EAR_THRESHOLD = 0.2
         self.YAW_DISTRACT_THRESHOLD = 30  # degrees
+        self.FACE_CONFIDENCE = self.config.get("face_confidence", 0.5)
+        self.MAX_FACES = self.config.get("max_faces", 6)
+        self.MATCH_IOU = 0.3  # Minimum overlap to keep a guard's ID across detections
 
         self.cam_matrix = np.array([[650, 0, 320],
                                     [0, 650, 240],
                                     [0, 0, 1]], dtype=np.float32)
         self.dist_coeffs = np.zeros((4,1))  # Assuming no lens distortion
 
-    def eye_aspect_ratio(self, eye):
-        A = dist.euclidean(eye[1], eye[5])
-        B = dist.euclidean(eye[2], eye[4])
-        C = dist.euclidean(eye[0], eye[3])
-        return (A + B) / (2.0 * C)
-
-    def get_eye_landmarks(self, shape):
-        left_eye = [(shape.part(i).x, shape.part(i).y) for i in range(36, 42)]
-        right_eye = [(shape.part(i).x, shape.part(i).y) for i in range(42, 48)]
-        return np.array(left_eye), np.array(right_eye)
-
-    def estimate_yaw(self, shape):
-        image_points = np.array([
-            (shape.part(30).x, shape.part(30).y),  # Nose tip
-            (shape.part(8).x, shape.part(8).y),    # Chin
-            (shape.part(36).x, shape.part(36).y),  # Left eye
-            (shape.part(45).x, shape.part(45).y),  # Right eye
-            (shape.part(48).x, shape.part(48).y),  # Left mouth
-            (shape.part(54).x, shape.part(54).y),  # Right mouth
-        ], dtype="double")
-
-        model_points = np.array([
-            (0.0, 0.0, 0.0),               # Nose tip
-            (0.0, -63.6, -12.5),           # Chin
-            (-43.3, 32.7, -26.0),          # Left eye
-            (43.3, 32.7, -26.0),           # Right eye
-            (-28.9, -28.9, -24.1),         # Left mouth
-            (28.9, -28.9, -24.1),          # Right mouth
-        ])
-
-        success, rotation_vec, _ = cv2.solvePnP(model_points, image_points, self.cam_matrix, self.dist_coeffs)
+        # Detect-then-track: the face SSD runs every detect_interval frames, or as soon as
+        # any correlation tracker's confidence (peak-to-sidelobe ratio) drops below
+        # min_track_quality. In between faces are tracked from their last landmark boxes.
+        self.detect_interval = self.config.get("detect_interval", 10)
+        self.min_track_quality = self.config.get("min_track_quality", 7.0)
+        self.frames_since_detection = 0
+
+        self.faces = []
+        self.next_face_id = 1
+
+    def mean_eye_aspect_ratio(self, points):
+        """
+        EAR averaged over both eyes for a (68, 2) landmark array, or for every
+        face at once given a (F, 68, 2) stack
+        """
+        eyes = points[..., 36:48, :].reshape(points.shape[:-2] + (2, 6, 2))
+        A = np.linalg.norm(eyes[..., 1, :] - eyes[..., 5, :], axis=-1)
+        B = np.linalg.norm(eyes[..., 2, :] - eyes[..., 4, :], axis=-1)
+        C = np.linalg.norm(eyes[..., 0, :] - eyes[..., 3, :], axis=-1)
+        return np.mean((A + B) / (2.0 * C), axis=-1)
+
+    def estimate_yaw(self, points, face=None):
+        image_points = points[POSE_LANDMARKS]
+
+        if face is not None and face.rotation_vec is not None:
+            success, rotation_vec, translation_vec = cv2.solvePnP(
+                MODEL_POINTS, image_points, self.cam_matrix, self.dist_coeffs,
+                face.rotation_vec, face.translation_vec, useExtrinsicGuess=True)
+        else:
+            success, rotation_vec, translation_vec = cv2.solvePnP(
+                MODEL_POINTS, image_points, self.cam_matrix, self.dist_coeffs)
+        if face is not None:
+            face.rotation_vec, face.translation_vec = (rotation_vec, translation_vec) if success else (None, None)
         if not success:
             return None
         rmat, _ = cv2.Rodrigues(rotation_vec)
         angles, _, _, _, _, _ = cv2.RQDecomp3x3(rmat)
         return angles[1]  # Yaw
 
-    def run(self, frame: np.ndarray, timestamp: str = None) -> dict:
+    def forward_batch(self, frames, contexts=None):
+        """Runs the face SSD once over a batch of frames"""
+        blob = batch_blob(frames, contexts, 1.0, (300, 300), (104, 177, 123))
+        return split_ssd_detections(self.face_net.forward(blob), len(frames))
+
+    def track(self, gray):
+        """Follows every guard with its correlation tracker; returns False when a detection is due"""
+        if not self.faces or self.frames_since_detection >= self.detect_interval:
+            return False
+
+        h, w = gray.shape[:2]
+        for face in self.faces:
+            if face.tracker is None or face.tracker.update(gray) < self.min_track_quality:
+                return False
+            pos = face.tracker.get_position()
+            x1, y1 = max(0, int(pos.left())), max(0, int(pos.top()))
+            x2, y2 = min(w - 1, int(pos.right())), min(h - 1, int(pos.bottom()))
+            if x2 <= x1 or y2 <= y1:
+                return False
+            face.box = np.array([x1, y1, x2, y2])
+
+        self.frames_since_detection += 1
+        return True
+
+    def seed_tracker(self, gray, face, points):
+        x1, y1 = points.min(axis=0).astype(int)
+        x2, y2 = points.max(axis=0).astype(int)
+        if face.tracker is None:
+            face.tracker = dlib.correlation_tracker()
+        face.tracker.start_track(gray, dlib.rectangle(int(x1), int(y1), int(x2), int(y2)))
+
+    def detect_faces(self, detections, h, w):
+        """Boxes of every face above the confidence threshold, most confident first"""
+        confidences = detections[0, 0, :, 2]
+        keep = np.flatnonzero(confidences > self.FACE_CONFIDENCE)
+        keep = keep[np.argsort(-confidences[keep])][:self.MAX_FACES]
+        boxes = detections[0, 0, keep, 3:7] * np.array([w, h, w, h])
+        return boxes.astype("int")
+
+    def associate(self, boxes):
+        """Matches new detections to existing guards by IoU so IDs stay stable"""
+        previous = self.faces
+        matched = {}
+        if previous and len(boxes):
+            iou = box_iou(boxes.astype(np.float64), np.array([face.box for face in previous], dtype=np.float64))
+            # Greedy assignment, highest overlap first
+            for flat in np.argsort(-iou, axis=None):
+                i, j = np.unravel_index(flat, iou.shape)
+                if iou[i, j] < self.MATCH_IOU:
+                    break
+                if i not in matched and j not in matched.values():
+                    matched[i] = j
+
+        faces = []
+        for i, box in enumerate(boxes):
+            if i in matched:
+                face = previous[matched[i]]
+                face.box = box
+            else:
+                face = FaceTrack(self.next_face_id, box)
+                self.next_face_id += 1
+            faces.append(face)
+        self.faces = faces
+
+    def fast_path(self, frame, timestamp=None, context=None):
+        """Analyzes the tracked faces while tracking holds; None when a detection is due"""
+        gray = context.gray if context is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.track(gray):
+            return self.analyze_faces(gray)
+        return None
+
+    def run_batch(self, frames, timestamps=None, contexts=None):
+        if self.detect_interval > 1:
+            # Tracking makes each frame depend on the previous one; the per-frame
+            # loop still only runs the face SSD when a detection is due
+            return self.run_sequential(frames, timestamps, contexts)
+        return super().run_batch(frames, timestamps, contexts)
+
+    def postprocess(self, frame, detections, timestamp=None, context=None):
         h, w = frame.shape[:2]
-        blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104, 177, 123))
-        self.face_net.setInput(blob)
-        detections = self.face_net.forward()
-
-        best_conf = 0
-        face_box = None
-        for i in range(detections.shape[2]):
-            conf = detections[0, 0, i, 2]
-            if conf > 0.5 and conf > best_conf:
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                face_box = box.astype("int")
-                best_conf = conf
-
-        if face_box is None:
+        self.associate(self.detect_faces(detections, h, w))
+        self.frames_since_detection = 0
+
+        if not self.faces:
             return {
                 "status": "absent",
                 "confidence": 1.0,
                 "details": "No person detected",
-                "module": "guard_vigilance"
+                "module": "guard_vigilance",
+                "persons": []
             }
 
-        x1, y1, x2, y2 = face_box
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        rect = dlib.rectangle(x1, y1, x2, y2)
-        shape = self.predictor(gray, rect)
+        gray = context.gray if context is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return self.analyze_faces(gray)
+
+    def analyze_faces(self, gray):
+        # dlib has no batched predictor call; everything after it runs on the (F, 68, 2) stack
+        points = np.stack([shape_to_np(self.predictor(gray, dlib.rectangle(*(int(v) for v in face.box))))
+                           for face in self.faces])
+        if self.detect_interval > 1:
+            for face, face_points in zip(self.faces, points):
+                self.seed_tracker(gray, face, face_points)
+
+        ears = self.mean_eye_aspect_ratio(points)
+        yaws = np.array([np.nan if yaw is None else yaw for yaw in
+                         (self.estimate_yaw(face_points, face) for face, face_points in zip(self.faces, points))])
+
+        abs_yaws = np.abs(yaws)
+        statuses = np.where(np.isnan(yaws), "unknown",
+                   np.where(abs_yaws > self.YAW_DISTRACT_THRESHOLD, "distracted",
+                   np.where(ears < self.EAR_THRESHOLD, "sleeping", "attentive")))
 
-        left_eye, right_eye = self.get_eye_landmarks(shape)
-        ear = (self.eye_aspect_ratio(left_eye) + self.eye_aspect_ratio(right_eye)) / 2.0
-        yaw = self.estimate_yaw(shape)
+        persons = [{
+            "id": face.id,
+            "status": str(status),
+            "ear": round(float(ear), 3),
+            "yaw": None if np.isnan(yaw) else round(float(yaw), 1),
+            "box": [int(v) for v in face.box]
+        } for face, status, ear, yaw in zip(self.faces, statuses, ears, yaws)]
 
-        if yaw is None:
+        worst = min(persons, key=lambda person: STATUS_PRIORITY.index(person["status"]))
+        if worst["status"] == "unknown" and len(persons) == 1:
             return {
                 "status": "unknown",
                 "confidence": 0.0,
                 "details": "Pose estimation failed",
-                "module": "guard_vigilance"
+                "module": "guard_vigilance",
+                "persons": persons
             }
 
-        status = "attentive"
-        if abs(yaw) > self.YAW_DISTRACT_THRESHOLD:
-            status = "distracted"
-        if ear < self.EAR_THRESHOLD and abs(yaw) <= self.YAW_DISTRACT_THRESHOLD:
-            status = "sleeping"
+        if len(persons) == 1:
+            details = f"EAR: {worst['ear']:.3f}, Yaw: {worst['yaw']:.1f}deg"
+        else:
+            details = f"{len(persons)} guards: " + "; ".join(
+                f"#{person['id']} {person['status']}" for person in persons)
 
         return {
-            "status": status,
-            "confidence": round(ear, 3),
-            "details": f"EAR: {ear:.3f}, Yaw: {yaw:.1f}deg",
-            "module": "guard_vigilance"
+            "status": worst["status"],
+            "confidence": worst["ear"] if worst["status"] != "unknown" else 0.0,
+            "details": details,
+            "module": "guard_vigilance",
+            "persons": persons
         }
@@ -1,45 +1,122 @@
 # modules/unattended_object_touch/inference.py
-import cv2
-import torch
+import os
+import time
+
 import numpy as np
 
-class UnattendedObjectTouchModule:
-    def __init__(self):
-        self.model = torch.hub.load('ultralytics/yolov5', 'yolov5s', trust_repo=True)
-        self.target_objects = ['backpack', 'bottle', 'laptop', 'handbag']
-
-    def run(self, frame: np.ndarray, timestamp: str = None) -> dict:
-        results = self.model(frame)
-        detections = results.pandas().xyxy[0]
-
-        persons = detections[detections['name'] == 'person']
-        objects = detections[detections['name'].isin(self.target_objects)]
-        touched_objects = set()
-
-        for _, person in persons.iterrows():
-            px1, py1, px2, py2 = int(person.xmin), int(person.ymin), int(person.xmax), int(person.ymax)
-            pw, ph = px2 - px1, py2 - py1
-            left_hand = (px1 + int(0.1 * pw), py1 + int(0.4 * ph))
-            right_hand = (px2 - int(0.1 * pw), py1 + int(0.4 * ph))
-
-            # Draw person box and hands
-            cv2.rectangle(frame, (px1, py1), (px2, py2), (0, 255, 0), 2)
-            cv2.circle(frame, left_hand, 5, (255, 0, 0), -1)
-            cv2.circle(frame, right_hand, 5, (0, 0, 255), -1)
-
-            for _, obj in objects.iterrows():
-                ox1, oy1, ox2, oy2 = int(obj.xmin), int(obj.ymin), int(obj.xmax), int(obj.ymax)
-                label = obj['name']
-                # Draw object box and label
-                cv2.rectangle(frame, (ox1, oy1), (ox2, oy2), (255, 255, 0), 2)
-                cv2.putText(frame, label, (ox1, oy1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 2)
-
-                if ox1 < left_hand[0] < ox2 and oy1 < left_hand[1] < oy2 or \
-                   ox1 < right_hand[0] < ox2 and oy1 < right_hand[1] < oy2:
-                    touched_objects.add(label)
-
-        status = "touching" if touched_objects else "no_touch"
-        details = f"Touched: {', '.join(touched_objects) if touched_objects else 'None'}"
+from core.module_interface import MonitoringModule
+from core.detection import Detections, shared_detections
+from core.annotation import annotation_layer
+from core.backends import load_yolo
+from modules.object_interaction.registry import ObjectRegistry
+
+MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+
+class UnattendedObjectTouchModule(MonitoringModule):
+    RESULT_NAME = "unattended_object_touch"
+    MOTION_GATED = True
+    DETECTION_CLASSES = {"person", "backpack", "bottle", "laptop", "handbag"}
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.target_objects = self.config.get("target_objects", ['backpack', 'bottle', 'laptop', 'handbag'])
+        self.DETECTION_CLASSES = {"person", *self.target_objects}
+
+        # With shared_detector YOLOv5 is only loaded if a frame arrives without shared detections
+        self.model = None if self.config.get("shared_detector") else self.load_model()
+
+        # Objects are remembered across frames; only unattended ones are checked for touches
+        self.registry = ObjectRegistry(
+            unattended_after=self.config.get("unattended_after", 10.0),
+            forget_after=self.config.get("forget_after", 2.0)
+        )
+
+    def load_model(self):
+        # weights:  local YOLOv5 checkpoint under models/; the default is yolov5su, the
+        #           anchor-free YOLOv5s release ultralytics loads (the original
+        #           anchor-based yolov5s.pt needs the torch.hub code it no longer uses)
+        # provider: "torch" (default), "onnxruntime", "openvino" or "torchscript"
+        # threads:  intra-op thread count; int8: load INT8 quantized weights
+        # warmup:   run one dummy inference at startup (default True)
+        # download: fetch missing weights from the ultralytics releases (default False:
+        #           a missing file is an error, so startup never touches the network)
+        return load_yolo(self.config.get("weights", os.path.join(MODEL_DIR, "yolov5su.pt")),
+                         provider=self.config.get("provider", "torch"),
+                         threads=self.config.get("threads"),
+                         int8=self.config.get("int8", False),
+                         warmup=self.config.get("warmup", True),
+                         download=self.config.get("download", False))
+
+    def forward_batch(self, frames, contexts=None):
+        """Person and target-object Detections for a batch of frames, shared or from one YOLOv5 pass"""
+        shared = shared_detections(contexts)
+        if shared is not None:
+            return [detections.select(self.DETECTION_CLASSES) for detections in shared]
+
+        if self.model is None:
+            self.model = self.load_model()
+        return [Detections.from_ultralytics(r).select(self.DETECTION_CLASSES)
+                for r in self.model(list(frames), verbose=False)]
+
+    def hand_points(self, persons):
+        """Approximate left/right hand positions for (P, 4) person boxes as a (P, 2, 2) array"""
+        px1, py1, px2, py2 = persons.T
+        pw, ph = px2 - px1, py2 - py1
+        dx = (0.1 * pw).astype(int)
+        hand_y = py1 + (0.4 * ph).astype(int)
+        return np.stack([np.stack([px1 + dx, hand_y], axis=1),
+                         np.stack([px2 - dx, hand_y], axis=1)], axis=1)
+
+    def touched_mask(self, hands, objects):
+        """(O,) bool: object boxes that contain any hand of any person, in one broadcast"""
+        if not len(hands) or not len(objects):
+            return np.zeros(len(objects), dtype=bool)
+        hx, hy = hands[:, :, None, 0], hands[:, :, None, 1]   # (P, 2, 1)
+        ox1, oy1, ox2, oy2 = objects.T                        # (O,)
+        inside = (ox1 < hx) & (hx < ox2) & (oy1 < hy) & (hy < oy2)  # (P, 2, O)
+        return inside.any(axis=(0, 1))
+
+    def postprocess(self, frame, detections, timestamp=None, context=None):
+        boxes = detections.boxes.astype(int)
+        persons = boxes[detections.mask({"person"})]
+        object_mask = detections.mask(self.target_objects)
+        objects = boxes[object_mask]
+        object_labels = [detections.names[class_id] for class_id in detections.class_ids[object_mask]]
+
+        now = context.time if context is not None else time.time()
+        tracked = self.registry.update(persons, objects, object_labels, now)
+        unattended = [obj for obj in tracked if obj.unattended]
+
+        hands = self.hand_points(persons)
+        unattended_boxes = np.array([obj.box for obj in unattended]).reshape(-1, 4)
+        touched = self.touched_mask(hands, unattended_boxes)
+        touched_objects = {f"{obj.label}#{obj.id}" for obj, hit in zip(unattended, touched) if hit}
+
+        # Draw person boxes and hands
+        canvas = annotation_layer(frame, context)
+        for (px1, py1, px2, py2), (left_hand, right_hand) in zip(persons, hands):
+            canvas.rectangle((int(px1), int(py1)), (int(px2), int(py2)), (0, 255, 0), 2)
+            canvas.circle((int(left_hand[0]), int(left_hand[1])), 5, (255, 0, 0), -1)
+            canvas.circle((int(right_hand[0]), int(right_hand[1])), 5, (0, 0, 255), -1)
+
+        # Draw each object box and label once; unattended objects in red
+        unattended_ids = {obj.id for obj in unattended}
+        for obj in tracked:
+            ox1, oy1, ox2, oy2 = (int(v) for v in obj.box)
+            color = (0, 0, 255) if obj.id in unattended_ids else (255, 255, 0)
+            canvas.rectangle((ox1, oy1), (ox2, oy2), color, 2)
+            canvas.text(f"{obj.label}#{obj.id}", (ox1, oy1 - 10), 0.5, color, 2)
+
+        if touched_objects:
+            status = "touching"
+            details = f"Touched: {', '.join(sorted(touched_objects))}"
+        elif unattended:
+            status = "unattended"
+            details = "Unattended: " + ", ".join(
+                f"{obj.label}#{obj.id} ({obj.unattended_for(now):.0f}s)" for obj in unattended)
+        else:
+            status = "no_touch"
+            details = "Touched: None"
 
         return {
             "status": status,
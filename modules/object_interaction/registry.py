@@ -0,0 +1,167 @@
+# modules/object_interaction/registry.py
+from collections import defaultdict
+
+import numpy as np
+
+
+class SpatialGrid:
+    """Uniform grid hash of track centers; a query only looks at the 3x3 cells around a point"""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def clear(self):
+        self.cells.clear()
+
+    def insert(self, item_id, x, y):
+        self.cells[self._cell(x, y)].append(item_id)
+
+    def nearby(self, x, y):
+        cx, cy = self._cell(x, y)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                yield from self.cells.get((cx + dx, cy + dy), ())
+
+
+class Track:
+    def __init__(self, track_id, label, box, now):
+        self.id = track_id
+        self.label = label
+        self.box = box
+        self.first_seen = now
+        self.last_seen = now
+
+    @property
+    def center(self):
+        return (self.box[0] + self.box[2]) / 2.0, (self.box[1] + self.box[3]) / 2.0
+
+
+class TrackedObject(Track):
+    def __init__(self, track_id, label, box, now):
+        super().__init__(track_id, label, box, now)
+        self.owner = None          # ID of the person the object arrived with
+        self.last_attended = now   # Last time the owner was within reach
+        self.unattended = False    # As of the start of the latest frame
+
+    def unattended_for(self, now):
+        return now - self.last_attended
+
+
+class ObjectRegistry:
+    """
+    Frame-to-frame memory of people and target objects.
+
+    Detections are associated with existing tracks of the same label through a
+    spatial grid (nearest center within the track's match radius), so every
+    object and person keeps a stable ID. The radius is match_distance or
+    match_size_ratio of the track's box diagonal, whichever is larger, plus
+    match_speed box diagonals per second since the track was last seen. A
+    person close to the camera, or one seen again after a slow inference,
+    dropped frames or motion gating, therefore keeps their ID and with it
+    the ownership of their objects.
+
+    An object's owner is the person within reach when it was first seen; an
+    object that appears with nobody near has no owner. The owner being within
+    reach again marks the object as attended. An object whose owner has not
+    been within reach for unattended_after seconds is unattended; this is
+    decided before the frame's attendance is applied, so someone reaching an
+    unattended object does not make it attended.
+
+    Tracks not seen for forget_after seconds are dropped.
+    """
+
+    def __init__(self, match_distance=80, reach_margin=0.25, unattended_after=10.0, forget_after=2.0,
+                 match_size_ratio=0.5, match_speed=1.0):
+        self.match_distance = match_distance
+        self.match_size_ratio = match_size_ratio
+        self.match_speed = match_speed
+        self.reach_margin = reach_margin
+        self.unattended_after = unattended_after
+        self.forget_after = forget_after
+
+        self.objects = {}
+        self.persons = {}
+        self.next_id = 1
+        self._grid = SpatialGrid(match_distance)
+
+    def _associate(self, tracks, boxes, labels, now, track_class):
+        """Matches boxes to tracks of the same label; returns the track for each box"""
+        radius = {track_id: self.match_radius(track, now) for track_id, track in tracks.items()}
+        # Cells as large as the largest radius, so the 3x3 neighbourhood covers every candidate
+        self._grid.cell_size = max(radius.values(), default=self.match_distance)
+        self._grid.clear()
+        for track in tracks.values():
+            self._grid.insert(track.id, *track.center)
+
+        centers = (boxes[:, :2] + boxes[:, 2:4]) / 2.0
+        candidates = []
+        for i, (cx, cy) in enumerate(centers):
+            for track_id in self._grid.nearby(cx, cy):
+                track = tracks[track_id]
+                if track.label != labels[i]:
+                    continue
+                tx, ty = track.center
+                distance = np.hypot(cx - tx, cy - ty)
+                if distance <= radius[track_id]:
+                    candidates.append((distance, i, track_id))
+
+        # Greedy, closest pairs first
+        assigned, used = {}, set()
+        for _, i, track_id in sorted(candidates):
+            if i not in assigned and track_id not in used:
+                assigned[i] = tracks[track_id]
+                used.add(track_id)
+
+        matched = []
+        for i, box in enumerate(boxes):
+            track = assigned.get(i)
+            if track is None:
+                track = track_class(self.next_id, labels[i], box, now)
+                tracks[track.id] = track
+                self.next_id += 1
+            track.box = box
+            track.last_seen = now
+            matched.append(track)
+
+        for track_id in [track_id for track_id, track in tracks.items()
+                         if now - track.last_seen > self.forget_after]:
+            del tracks[track_id]
+        return matched
+
+    def match_radius(self, track, now):
+        x1, y1, x2, y2 = track.box
+        diagonal = float(np.hypot(x2 - x1, y2 - y1))
+        return (max(self.match_distance, self.match_size_ratio * diagonal)
+                + self.match_speed * diagonal * (now - track.last_seen))
+
+    def within_reach(self, person_boxes, object_boxes):
+        """(O, P) bool: object box overlaps the person box grown by reach_margin of its size"""
+        if not len(person_boxes) or not len(object_boxes):
+            return np.zeros((len(object_boxes), len(person_boxes)), dtype=bool)
+        px1, py1, px2, py2 = person_boxes.T.astype(float)
+        mx, my = (px2 - px1) * self.reach_margin, (py2 - py1) * self.reach_margin
+        ox1, oy1, ox2, oy2 = (object_boxes[:, i, None].astype(float) for i in range(4))
+        return (ox1 < px2 + mx) & (ox2 > px1 - mx) & (oy1 < py2 + my) & (oy2 > py1 - my)
+
+    def update(self, person_boxes, object_boxes, object_labels, now):
+        """Feeds one frame of detections; returns the TrackedObject for every visible object"""
+        persons = self._associate(self.persons, person_boxes, ["person"] * len(person_boxes), now, Track)
+        objects = self._associate(self.objects, object_boxes, object_labels, now, TrackedObject)
+
+        reach = self.within_reach(person_boxes, object_boxes)
+        person_ids = np.array([person.id for person in persons], dtype=int)
+        for obj, near in zip(objects, reach):
+            obj.unattended = self.is_unattended(obj, now)
+            near_ids = person_ids[near]
+            if obj.first_seen == now and len(near_ids):
+                obj.owner = int(near_ids[0])
+            if obj.owner is not None and obj.owner in near_ids:
+                obj.last_attended = now
+        return objects
+
+    def is_unattended(self, obj, now):
+        return obj.unattended_for(now) > self.unattended_after
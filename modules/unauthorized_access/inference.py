@@ -1,77 +1,172 @@
 import cv2
 import datetime
+import time
 import numpy as np
-from ultralytics import YOLO
 from core.module_interface import MonitoringModule
+from core.detection import Detections, shared_detections
+from core.alert_store import AlertStore
+from core.annotation import annotation_layer
+from core.backends import load_yolo
+from core.zones import ZoneMap, foot_points, rectangle
+
+WINDOW_ZONE = "window_area"
 
 class UnauthorizedAccessModule(MonitoringModule):
+    RESULT_NAME = "unauthorized_access"
+    MOTION_GATED = True
+    DETECTION_CLASSES = {"person", "knife", "gun", "pistol", "rifle"}
+    DETECTION_FIELDS = {"boxes", "keypoints"}
+
     def __init__(self, config=None):
         super().__init__(config)
-        self.model = YOLO("yolov8n-pose.pt")
+        # With shared_detector the pose model is only loaded if a frame arrives without shared detections
+        self.model = None if self.config.get("shared_detector") else self.load_model()
         self.weapon_keywords = ['knife', 'gun', 'pistol', 'rifle']
-        self.window_area = config.get("window_area", (100, 500, 50, 400)) if config else (100, 500, 50, 400)
+        self._weapon_names = None
+        self._weapon_classes = {}
+
+        # The legacy window_area tuple (x_left, x_right, y_top, y_bottom) becomes the
+        # "window_area" zone; entry_zones names zones a person must not stand in
+        left, right, top, bottom = self.config.get("window_area", (100, 500, 50, 400))
+        zones = {WINDOW_ZONE: rectangle(left, top, right, bottom), **self.config.get("zones", {})}
+        self.zones = ZoneMap(zones, self.config.get("zone_scale", 0.25))
+        self.entry_zones = list(self.config.get("entry_zones", []))
 
         self.fps = 30
         self.frame_count = 0
         self.prev_frame = None
-        self.alerts = []
-        self.crawlers = []
-        self.weapon_first_seen = {}
-
-    def analyze_frame(self, results, frame):
-        people_count = 0
+        self._diff = None
+        # Alerts expire after alert_retention seconds; a crawl, unusual entry or a given
+        # weapon re-alerts only after its cooldown, so memory stays bounded on 24/7 runs
+        cooldowns = {"crawling": 1.0, "entry": 1.0, "weapon": 60.0}
+        cooldowns.update(self.config.get("alert_cooldowns", {}))
+        self.alerts = AlertStore(retention=self.config.get("alert_retention", 60.0),
+                                 cooldowns=cooldowns,
+                                 max_alerts=self.config.get("max_alerts", 100))
+
+    def load_model(self):
+        return load_yolo(self.config.get("weights", "yolov8n-pose.pt"),
+                         provider=self.config.get("provider", "torch"),
+                         threads=self.config.get("threads"),
+                         int8=self.config.get("int8", False),
+                         task="pose")
+
+    def weapon_classes(self, names):
+        """class index -> weapon keywords its name contains, recomputed only when the class table changes"""
+        if self._weapon_names != names:
+            self._weapon_names = dict(names)
+            self._weapon_classes = {
+                class_id: [weapon for weapon in self.weapon_keywords if weapon in name.lower()]
+                for class_id, name in names.items()
+                if any(weapon in name.lower() for weapon in self.weapon_keywords)
+            }
+        return self._weapon_classes
+
+    def crawling_mask(self, detections, person, height):
+        """(N,) bool: persons whose head keypoint is level with keypoint 5 near the bottom of the frame"""
+        keypoints = detections.keypoints
+        if keypoints is None or keypoints.ndim != 3 or keypoints.shape[1] < 6:
+            return np.zeros(len(detections), dtype=bool)
+        # NaN keypoints (rows without a pose) compare False
+        with np.errstate(invalid="ignore"):
+            low = keypoints[:, 0, 1] - keypoints[:, 5, 1] < 20
+        return person & low & (detections.boxes[:, 3] > height * 0.7)
+
+    def entry_mask(self, boxes, person, frame_shape):
+        """
+        (N,) bool: persons standing in any of the entry zones or, without entry
+        zones, persons extending past the window area horizontally and vertically
+        """
+        if self.entry_zones:
+            inside = self.zones.contains_points(foot_points(boxes), frame_shape, self.entry_zones)
+            return person & inside.any(axis=0)
+        left, top, right, bottom = self.zones.bounds(WINDOW_ZONE)
+        x1, y1, x2, y2 = boxes.T
+        return person & ((x1 < left) | (x2 > right)) & ((y1 < top) | (y2 > bottom))
+
+    def analyze_frame(self, detections, frame, now=None, context=None):
+        now = now if now is not None else time.time()
         height = frame.shape[0]
         timestamp = str(datetime.timedelta(seconds=int(self.frame_count / self.fps)))
-        annotated_frame = frame.copy()
-
-        for r in results:
-            for box, keypoints in zip(r.boxes, r.keypoints):
-                cls = int(box.cls[0])
-                name = self.model.names[cls]
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-
-                cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(annotated_frame, name, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-
-                if name == 'person':
-                    people_count += 1
-                    kp = keypoints.xy[0].cpu().numpy()
-                    if kp.shape[0] >= 6:
-                        head_y = kp[0][1]
-                        hip_y = kp[5][1]
-                        if head_y - hip_y < 20 and y2 > height * 0.7:
-                            if timestamp not in self.crawlers:
-                                self.crawlers.append(timestamp)
-                                self.alerts.append(f"[CRAWLING DETECTED] at {timestamp}")
-                                cv2.putText(annotated_frame, "CRAWLING!", (x1, y2 + 30),
-                                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-
-                    if (x1 < self.window_area[0] or x2 > self.window_area[1]) and \
-                       (y1 < self.window_area[2] or y2 > self.window_area[3]):
-                        msg = f"[UNUSUAL ENTRY DETECTED] at {timestamp} (Window/Fence)"
-                        if msg not in self.alerts:
-                            self.alerts.append(msg)
-                            cv2.putText(annotated_frame, "UNUSUAL ENTRY!", (30, 150),
-                                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-
-                for weapon in self.weapon_keywords:
-                    if weapon in name.lower() and weapon not in self.weapon_first_seen:
-                        self.weapon_first_seen[weapon] = timestamp
-                        self.alerts.append(f"[WEAPON: {weapon.upper()}] at {timestamp}")
-
-        return people_count, annotated_frame
-
-    def detect_motion(self, frame):
+        canvas = annotation_layer(frame, context)
+
+        # Every rule runs once over all rows of the frame's detection arrays
+        boxes = detections.boxes.astype(int)
+        person = detections.mask({"person"})
+        crawling = np.flatnonzero(self.crawling_mask(detections, person, height))
+        entering = self.entry_mask(boxes, person, frame.shape)
+        weapon_classes = self.weapon_classes(detections.names)
+        weapons = {weapon for class_id in np.unique(detections.class_ids)
+                   for weapon in weapon_classes.get(int(class_id), ())}
+
+        for (x1, y1, x2, y2), name in zip(boxes.tolist(), detections.labels):
+            canvas.rectangle((x1, y1), (x2, y2), (0, 255, 0), 2)
+            canvas.text(name, (x1, y1 - 10), 0.6, (0, 255, 0), 2)
+
+        if len(crawling) and self.alerts.add(("crawling",), f"[CRAWLING DETECTED] at {timestamp}", now):
+            x1, _, _, y2 = boxes[crawling[0]].tolist()
+            canvas.text("CRAWLING!", (x1, y2 + 30), 0.6, (0, 0, 255), 2)
+
+        if entering.any():
+            msg = f"[UNUSUAL ENTRY DETECTED] at {timestamp} (Window/Fence)"
+            if self.alerts.add(("entry",), msg, now):
+                canvas.text("UNUSUAL ENTRY!", (30, 150), 1, (0, 0, 255), 2)
+
+        for weapon in sorted(weapons):
+            self.alerts.add(("weapon", weapon), f"[WEAPON: {weapon.upper()}] at {timestamp}", now)
+
+        return int(person.sum())
+
+    def detect_motion(self, frame, context=None):
         motion_detected = False
-        if self.prev_frame is not None:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            frame_diff = cv2.absdiff(self.prev_frame, gray)
-            motion_score = np.sum(frame_diff) / (frame_diff.shape[0] * frame_diff.shape[1])
+        gray = context.gray if context is not None else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.prev_frame is not None and self.prev_frame.shape == gray.shape:
+            cv2.absdiff(self.prev_frame, gray, dst=self._diff)
+            motion_score = cv2.sumElems(self._diff)[0] / self._diff.size
             motion_detected = motion_score > 0.2
-        self.prev_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # The context's gray buffer is recycled two frames later, so keep our own copy in a reused buffer
+        if self.prev_frame is None or self.prev_frame.shape != gray.shape:
+            self.prev_frame = np.empty_like(gray)
+            self._diff = np.empty_like(gray)
+        np.copyto(self.prev_frame, gray)
         return motion_detected
 
-    def run(self, frame, timestamp=None):
+    def forward_batch(self, frames, contexts=None):
+        """Detections for a batch of frames, from the shared detector when available, else one pose model pass"""
+        shared = shared_detections(contexts)
+        if shared is not None:
+            return [detections.select(self.DETECTION_CLASSES) for detections in shared]
+
+        if self.model is None:
+            self.model = self.load_model()
+        return [Detections.from_ultralytics(r) for r in self.model(list(frames))]
+
+    def run(self, frame, timestamp=None, context=None):
+        if frame is None:
+            self.frame_count += 1
+            return self.error_result("Empty frame received")
+
+        try:
+            results = self.forward_batch([frame], [context] if context is not None else None)[0]
+        except Exception as e:
+            self.frame_count += 1
+            return self.error_result(f"Processing error: {str(e)}")
+
+        return self.postprocess(frame, results, timestamp, context)
+
+    def run_batch(self, frames, timestamps=None, contexts=None):
+        timestamps = timestamps if timestamps is not None else [None] * len(frames)
+        contexts = contexts if contexts is not None else [None] * len(frames)
+        try:
+            batch_results = self.forward_batch(frames, contexts)
+        except Exception as e:
+            self.frame_count += len(frames)
+            return [self.error_result(f"Processing error: {str(e)}") for _ in frames]
+
+        return [self.postprocess(frame, results, timestamp, context)
+                for frame, results, timestamp, context in zip(frames, batch_results, timestamps, contexts)]
+
+    def postprocess(self, frame, results, timestamp=None, context=None):
         self.frame_count += 1
         result = {
             "status": "normal",
@@ -80,33 +175,20 @@ class UnauthorizedAccessModule(MonitoringModule):
             "module": "unauthorized_access"
         }
 
-        if frame is None:
-            result.update({
-                "status": "error",
-                "confidence": 0.0,
-                "details": "Empty frame received"
-            })
-            return result
-
         try:
-            results = self.model(frame)
-            _, annotated = self.analyze_frame(results, frame)
-            self.detect_motion(frame)
+            now = context.time if context is not None else time.time()
+            self.analyze_frame(results, frame, now, context)
+            self.detect_motion(frame, context)
 
-            if self.alerts:
+            recent = self.alerts.recent(now, limit=3)
+            if recent:
                 result.update({
                     "status": "alert",
                     "confidence": 0.95,
-                    "details": "; ".join(self.alerts[-3:])
+                    "details": "; ".join(recent)
                 })
 
-            result["annotated_frame"] = annotated
-
         except Exception as e:
-            result.update({
-                "status": "error",
-                "confidence": 0.0,
-                "details": f"Processing error: {str(e)}"
-            })
+            result = self.error_result(f"Processing error: {str(e)}")
 
         return result
@@ -0,0 +1,57 @@
+# tests/test_event_log.py
+import glob
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.event_log import SUFFIX, EventLog, query  # noqa: E402
+
+
+def result(module, status, confidence, details):
+    return {"module": module, "status": status, "confidence": confidence, "details": details}
+
+
+def write_log(directory):
+    # flush_rows=2 and explicit flushes give several blocks in one file
+    log = EventLog(directory, flush_rows=2, flush_interval=60.0)
+    log.append(result("guard_vigilance", "attentive", 1.0, "ok"), "t0", camera=0, now=10.0)
+    log.append(result("anomaly_detector", "anomaly", 1.0, "1 person(s) détecté"), "t1", camera=1, now=11.0)
+    log.flush()
+    log.append(result("guard_vigilance", "drowsy", 0.5, ""), "t2", camera=0, now=20.0)
+    log.flush()
+    log.append(result("anomaly_detector", "inactive", 0.0, "System outside active hours"), "t3", camera=1, now=30.0)
+    log.close()
+
+
+def test_round_trip(tmp_path):
+    write_log(str(tmp_path))
+    rows = query(str(tmp_path))
+
+    assert list(rows["time"]) == [10.0, 11.0, 20.0, 30.0]
+    assert list(rows["camera"]) == ["0", "1", "0", "1"]
+    assert list(rows["module"]) == ["guard_vigilance", "anomaly_detector", "guard_vigilance", "anomaly_detector"]
+    assert list(rows["status"]) == ["attentive", "anomaly", "drowsy", "inactive"]
+    assert list(rows["timestamp"]) == ["t0", "t1", "t2", "t3"]
+    assert list(rows["details"]) == ["ok", "1 person(s) détecté", "", "System outside active hours"]
+    assert [round(float(c), 3) for c in rows["confidence"]] == [1.0, 1.0, 0.5, 0.0]
+
+
+def test_filters(tmp_path):
+    write_log(str(tmp_path))
+
+    assert list(query(str(tmp_path), start=15.0, end=25.0)["timestamp"]) == ["t2"]
+    assert list(query(str(tmp_path), camera=1)["timestamp"]) == ["t1", "t3"]
+    assert list(query(str(tmp_path), module="guard_vigilance", status="drowsy")["timestamp"]) == ["t2"]
+    assert len(query(str(tmp_path), status="error")["time"]) == 0
+
+
+def test_truncated_trailing_block(tmp_path):
+    write_log(str(tmp_path))
+    path, = glob.glob(os.path.join(str(tmp_path), "*" + SUFFIX))
+
+    # A process killed mid-flush leaves the last block cut short
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 10)
+
+    assert list(query(str(tmp_path))["timestamp"]) == ["t0", "t1", "t2"]